@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Набор замеров производительности с фиксированными зёрнами.
+#
+# Каждый случай - один вызов генератора, генетического алгоритма или экспорта
+# с заданными параметрами: число автобусов, водители типов A и B, тип дня
+# (будни или выходной), представление расписания и размеры популяции.
+# Для случая записываются время (лучшее из --repeat запусков), пиковая память
+# по tracemalloc (отдельный первый запуск, чтобы трассировка не искажала
+# время, а прогрев не попадал в замер) и
+# качество расписания - тройка calculate_statistics. Перед каждым запуском
+# random.seed получает зерно из --seed и имени случая, поэтому расписания и
+# статистика воспроизводимы.
+#
+# Результаты пишутся в JSON; с --compare они сравниваются с сохранённым
+# базовым файлом, регрессии печатаются, и код возврата становится 1.
+#
+# Примеры:
+#   python bus_schedule_bench.py -o baseline.json
+#   python bus_schedule_bench.py --compare baseline.json -o current.json
+#   python bus_schedule_bench.py --suite full --filter genetic/numpy
+
+import argparse
+import datetime
+import functools
+import gc
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import bus_schedule_core as core
+import bus_schedule_compact as compact
+import bus_schedule_events as events
+import bus_schedule_exact as exact
+import bus_schedule_export as export
+
+# genetic_optimizer импортирует бэкенд numpy лениво; импорт заранее не даёт
+# ему попасть в замер памяти первого случая
+try:
+    import bus_schedule_vectorized  # noqa: F401
+except ImportError:
+    pass
+
+# Представители типов дня: понедельник и суббота
+DAYS = {'regular': datetime.date(2024, 3, 4), 'off': datetime.date(2024, 3, 9)}
+
+# Точки масштаба: (автобусы, водители A, водители B)
+QUICK_SIZES = [(8, 10, 5), (40, 50, 25)]
+FULL_SIZES = QUICK_SIZES + [(200, 250, 125), (1000, 1500, 750)]
+# Размеры генетического алгоритма: (популяция, поколения)
+QUICK_GA_SIZES = [(20, 50), (core.POPULATION_SIZE_GA, core.GENERATIONS_GA)]
+FULL_GA_SIZES = QUICK_GA_SIZES + [(500, core.GENERATIONS_GA)]
+GA_BACKENDS = core.GA_BACKENDS if 'bus_schedule_vectorized' in sys.modules else ('objects', 'compact')
+# Генетический алгоритм на больших точках слишком долог для регулярного прогона
+GA_MAX_BUSES = 200
+
+DEFAULT_TIME_TOLERANCE = 0.2
+DEFAULT_MEMORY_TOLERANCE = 0.2
+# Рост меньше этих величин не считается регрессией: короткие случаи шумят
+MIN_TIME_DELTA_MS = 1.0
+MIN_MEMORY_DELTA_KIB = 16.0
+
+
+def _linear(backend, bus_count, type_a_drivers, type_b_drivers, current_date):
+    if backend == 'compact':
+        return compact.create_linear_schedule_compact(bus_count, type_a_drivers, type_b_drivers, current_date)
+    return core.create_linear_schedule(bus_count, type_a_drivers, type_b_drivers, current_date)
+
+
+def _initial(backend, bus_count, type_a_drivers, type_b_drivers, current_date):
+    if backend == 'compact':
+        return compact.generate_initial_schedule_compact(bus_count, type_a_drivers, type_b_drivers, current_date)
+    return core.generate_initial_schedule(bus_count, type_a_drivers, type_b_drivers, current_date)
+
+
+def _genetic(backend, population_size, generations, bus_count, type_a_drivers, type_b_drivers, current_date):
+    return core.genetic_optimizer(bus_count, type_a_drivers, type_b_drivers, current_date, backend=backend,
+                                  population_size=population_size, generations=generations)
+
+
+# Экспорт: расписания готовятся заранее (prepare, вне замера), замеряется только запись
+class _ExportCase:
+    def __init__(self, fmt, job):
+        self.fmt = fmt
+        self.job = job
+        self.schedules = None
+
+    # Линейное и начальное случайное расписание (вместо генетического, чтобы не ждать GA)
+    def prepare(self, seed):
+        random.seed(f"{seed}:export:{self.job[:3]}:{self.job[3].isoformat()}")
+        self.schedules = (core.create_linear_schedule(*self.job), core.generate_initial_schedule(*self.job))
+
+    def __call__(self):
+        linear_schedule, optimized_schedule = self.schedules
+        current_date = self.job[3]
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, f'bench_{self.fmt}')
+            if self.fmt == 'csv':
+                core.export_schedule_to_csv(linear_schedule, optimized_schedule, filename, current_date)
+            elif self.fmt == 'rows':
+                export.export_rows_to_csv(export.schedule_pair(linear_schedule, optimized_schedule, current_date),
+                                          filename)
+            else:
+                export.export_schedule_columns(
+                    export.schedule_pair(linear_schedule, optimized_schedule, current_date), filename)
+        return optimized_schedule
+
+
+# Случаи набора: (имя, параметры, функция без аргументов). Если у функции
+# есть метод prepare(seed), он вызывается перед замером.
+def build_cases(suite='quick'):
+    sizes = QUICK_SIZES if suite == 'quick' else FULL_SIZES
+    ga_sizes = QUICK_GA_SIZES if suite == 'quick' else FULL_GA_SIZES
+    cases = []
+    for bus_count, type_a_drivers, type_b_drivers in sizes:
+        for day, current_date in DAYS.items():
+            job = (bus_count, type_a_drivers, type_b_drivers, current_date)
+            scale = f"b{bus_count}-a{type_a_drivers}-b{type_b_drivers}/{day}"
+            params = {'bus_count': bus_count, 'type_a': type_a_drivers, 'type_b': type_b_drivers, 'day': day}
+            for backend in ('objects', 'compact'):
+                cases.append((f"linear/{backend}/{scale}", dict(params, backend=backend),
+                              functools.partial(_linear, backend, *job)))
+                cases.append((f"initial/{backend}/{scale}", dict(params, backend=backend),
+                              functools.partial(_initial, backend, *job)))
+            cases.append((f"exact/compact/{scale}", dict(params, backend='compact'),
+                          functools.partial(exact.create_exact_schedule_compact, *job)))
+            for policy in events.POLICIES:
+                cases.append((f"events/{policy}/{scale}", dict(params, backend='compact', policy=policy),
+                              functools.partial(events.simulate_schedule_compact, *job, policy)))
+            if bus_count <= GA_MAX_BUSES:
+                for population_size, generations in ga_sizes:
+                    for backend in GA_BACKENDS:
+                        cases.append((f"genetic/{backend}/{scale}/p{population_size}-g{generations}",
+                                      dict(params, backend=backend, population_size=population_size,
+                                           generations=generations),
+                                      functools.partial(_genetic, backend, population_size, generations, *job)))
+            for fmt in ('csv', 'rows', 'columns'):
+                cases.append((f"export/{fmt}/{scale}", dict(params, format=fmt), _ExportCase(fmt, job)))
+    return cases
+
+
+# Один случай: лучшее время из repeat запусков, пиковая память, статистика
+def run_case(name, params, function, seed, repeat):
+    if hasattr(function, 'prepare'):
+        function.prepare(seed)
+    random.seed(f"{seed}:{name}")
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    # Сборщик мусора отключается на время замера, как в timeit
+    timings = []
+    schedule = None
+    for _ in range(repeat):
+        random.seed(f"{seed}:{name}")
+        gc.collect()
+        gc.disable()
+        try:
+            started = time.perf_counter()
+            schedule = function()
+            timings.append((time.perf_counter() - started) * 1000)
+        finally:
+            gc.enable()
+    return {
+        'name': name,
+        'params': params,
+        'wall_ms': round(min(timings), 3),
+        'wall_ms_runs': [round(value, 3) for value in timings],
+        'peak_kib': round(peak / 1024, 1),
+        'statistics': list(schedule.calculate_statistics()),
+    }
+
+
+def run_suite(suite='quick', seed=0, repeat=3, name_filter=None, progress=None):
+    results = []
+    for name, params, function in build_cases(suite):
+        if name_filter and name_filter not in name:
+            continue
+        result = run_case(name, params, function, seed, repeat)
+        if progress is not None:
+            progress(result)
+        results.append(result)
+    return {
+        'suite': suite,
+        'seed': seed,
+        'repeat': repeat,
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'results': results,
+    }
+
+
+# Сравнение с базовым прогоном: список (имя, вид регрессии, было, стало)
+def compare(report, baseline, time_tolerance=DEFAULT_TIME_TOLERANCE, memory_tolerance=DEFAULT_MEMORY_TOLERANCE):
+    if report.get('seed') != baseline.get('seed'):
+        raise ValueError(f"Зёрна прогонов различаются: {report.get('seed')} и {baseline.get('seed')}")
+    previous = {result['name']: result for result in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        old = previous.get(result['name'])
+        if old is None:
+            continue
+        if (result['wall_ms'] > old['wall_ms'] * (1 + time_tolerance)
+                and result['wall_ms'] - old['wall_ms'] >= MIN_TIME_DELTA_MS):
+            regressions.append((result['name'], 'time', old['wall_ms'], result['wall_ms']))
+        if (result['peak_kib'] > old['peak_kib'] * (1 + memory_tolerance)
+                and result['peak_kib'] - old['peak_kib'] >= MIN_MEMORY_DELTA_KIB):
+            regressions.append((result['name'], 'memory', old['peak_kib'], result['peak_kib']))
+        if result['statistics'] != old['statistics']:
+            # При одинаковом зерне расписание должно совпадать; любое отличие
+            # помечается, а ухудшение оценки - отдельно
+            kind = 'quality' if _fitness(result['statistics']) < _fitness(old['statistics']) else 'changed'
+            regressions.append((result['name'], kind, old['statistics'], result['statistics']))
+    return regressions
+
+
+# Оценка по тройке статистики (как assess_schedule)
+def _fitness(statistics):
+    return statistics[0] - statistics[2] * 0.1
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Замеры производительности генератора расписания")
+    parser.add_argument('--suite', choices=['quick', 'full'], default='quick', help="набор точек масштаба")
+    parser.add_argument('-o', '--output', default=None, help="файл JSON для результатов")
+    parser.add_argument('--seed', type=int, default=0, help="зерно генератора случайных чисел")
+    parser.add_argument('--repeat', type=int, default=3, help="число запусков для замера времени")
+    parser.add_argument('--filter', default=None, help="только случаи, имя которых содержит строку")
+    parser.add_argument('--compare', metavar='BASELINE', default=None, help="сравнить с сохранённым прогоном")
+    parser.add_argument('--time-tolerance', type=float, default=DEFAULT_TIME_TOLERANCE,
+                        help="допустимый рост времени (0.2 - на 20%%)")
+    parser.add_argument('--memory-tolerance', type=float, default=DEFAULT_MEMORY_TOLERANCE,
+                        help="допустимый рост пиковой памяти")
+    args = parser.parse_args(argv)
+    if args.repeat < 1:
+        parser.error("--repeat должно быть не меньше 1")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    def progress(result):
+        print(f"{result['name']:<60} {result['wall_ms']:>10.1f} ms {result['peak_kib']:>10.1f} KiB "
+              f"{result['statistics']}", file=sys.stderr)
+
+    report = run_suite(args.suite, args.seed, args.repeat, args.filter, progress)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(report, output, ensure_ascii=False, indent=1)
+    if args.compare is None:
+        return 0
+    with open(args.compare, encoding='utf-8') as baseline_file:
+        baseline = json.load(baseline_file)
+    regressions = compare(report, baseline, args.time_tolerance, args.memory_tolerance)
+    for name, kind, before, after in regressions:
+        print(f"REGRESSION {kind:<8} {name}: {before} -> {after}")
+    print(f"cases: {len(report['results'])}, regressions: {len(regressions)}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
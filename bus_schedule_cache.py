@@ -0,0 +1,247 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Кэш результатов генетического алгоритма на диске.
+#
+# Ключ - параметры запуска: число автобусов и водителей, тип дня (будни или
+# выходной - от даты расписание больше не зависит), бэкенд, размеры популяции,
+# MUTATION_RATE_GA, режим constraints и правила досрочной остановки. Каждая
+# запись - CompactBoard в отдельном файле (pickle), index.json хранит параметры,
+# размер и порядок использования записей. При превышении max_entries или
+# max_bytes удаляются давно не использованные записи (LRU).
+#
+# ResultCache.genetic_optimizer принимает те же аргументы, что и
+# core.genetic_optimizer:
+#   - точное совпадение ключа - сохранённое расписание возвращается сразу,
+#     с датой запроса;
+#   - ближайшая запись с теми же настройками, отличающаяся не больше чем на
+#     near_distance автобусов и водителей в сумме, - её расписание (без рейсов и
+#     водителей, которых нет в новом составе) становится первой особью
+#     начальной популяции (warm_start);
+#   - иначе - обычный запуск.
+# Итог последнего вызова - в last_outcome (HIT, WARM, MISS); при попадании
+# stopping получает причину STOP_CACHED и ноль поколений. Запуски,
+# остановленные лимитом времени или обработчиком, не сохраняются: их результат
+# зависит не только от параметров.
+#
+# Индекс перезаписывается целиком через временный файл и os.replace; кэш
+# рассчитан на один процесс, одновременная запись из нескольких процессов
+# может потерять обновления индекса, но не испортить записи.
+
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+
+from bus_schedule_core import (POPULATION_SIZE_GA, GENERATIONS_GA, MUTATION_RATE_GA, STOP_DEADLINE,
+                               STOP_CANCELLED, STOP_CACHED, is_off_day, genetic_optimizer)
+from bus_schedule_compact import CompactBoard, make_roster, from_schedule_board
+
+CACHE_VERSION = 1
+DEFAULT_MAX_ENTRIES = 256
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+NEAR_DISTANCE = 2
+
+HIT = 'hit'
+WARM = 'warm'
+MISS = 'miss'
+
+INDEX_NAME = 'index.json'
+
+
+# Параметры запуска, от которых зависит результат
+def cache_key(bus_count, type_a_drivers, type_b_drivers, current_date, backend='objects',
+              population_size=POPULATION_SIZE_GA, generations=GENERATIONS_GA, constraints=None, stopping=None):
+    return {
+        'version': CACHE_VERSION,
+        'bus_count': bus_count,
+        'type_a': type_a_drivers,
+        'type_b': type_b_drivers,
+        'day': 'off' if is_off_day(current_date) else 'regular',
+        'backend': backend,
+        'population_size': population_size,
+        'generations': generations,
+        'mutation_rate': MUTATION_RATE_GA,
+        'constraints': constraints,
+        'patience': None if stopping is None else stopping.patience,
+        'min_spread': None if stopping is None else stopping.min_spread,
+    }
+
+
+def _entry_name(key):
+    return hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+# Расстояние между ключами: сумма разниц в числе автобусов и водителей;
+# None, если отличаются другие параметры
+def _distance(key, other):
+    counts = ('bus_count', 'type_a', 'type_b')
+    if any(key[name] != other[name] for name in key if name not in counts):
+        return None
+    return sum(abs(key[name] - other[name]) for name in counts)
+
+
+# Расписание из кэша на ростере make_roster(type_a_drivers, type_b_drivers):
+# рейсы и водители, которых нет в новом составе, отбрасываются
+def adapt_board(board, type_a_drivers, type_b_drivers, current_date):
+    roster = make_roster(type_a_drivers, type_b_drivers)
+    positions = {driver: index for index, driver in enumerate(roster)}
+    mapping = [positions.get(driver) for driver in board.roster]
+    adapted = CompactBoard(current_date, roster)
+    for start, end, driver, peak in zip(board.starts, board.ends, board.drivers, board.peaks):
+        if mapping[driver] is not None:
+            adapted.starts.append(start)
+            adapted.ends.append(end)
+            adapted.drivers.append(mapping[driver])
+            adapted.peaks.append(peak)
+    for index, driver in enumerate(board.operators):
+        if mapping[driver] is None:
+            continue
+        adapted.operators.append(mapping[driver])
+        adapted.operator_types.append(board.operator_types[index])
+        for start, end, kind in board.operator_entries(index):
+            adapted.entry_starts.append(start)
+            adapted.entry_ends.append(end)
+            adapted.entry_kinds.append(kind)
+        adapted.offsets.append(len(adapted.entry_starts))
+    return adapted
+
+
+class ResultCache:
+    def __init__(self, directory, max_entries=DEFAULT_MAX_ENTRIES, max_bytes=DEFAULT_MAX_BYTES,
+                 near_distance=NEAR_DISTANCE):
+        if max_entries < 1 or max_bytes < 1:
+            raise ValueError("Размер кэша должен быть положительным")
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.near_distance = near_distance
+        self.last_outcome = None
+        self.stats = {HIT: 0, WARM: 0, MISS: 0}
+        os.makedirs(directory, exist_ok=True)
+        # Имя записи -> {'key', 'size', 'used'}; used растёт с каждым обращением
+        self._index = self._load_index()
+        self._clock = max((entry['used'] for entry in self._index.values()), default=0)
+
+    def __len__(self):
+        return len(self._index)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name + '.pickle')
+
+    def _load_index(self):
+        try:
+            with open(os.path.join(self.directory, INDEX_NAME), encoding='utf-8') as index_file:
+                index = json.load(index_file)
+        except (OSError, ValueError):
+            return {}
+        if not isinstance(index, dict) or index.get('version') != CACHE_VERSION:
+            return {}
+        return index['entries']
+
+    def _save_index(self):
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as index_file:
+            json.dump({'version': CACHE_VERSION, 'entries': self._index}, index_file)
+        os.replace(temporary, os.path.join(self.directory, INDEX_NAME))
+
+    def _touch(self, name):
+        self._clock += 1
+        self._index[name]['used'] = self._clock
+
+    def _read(self, name):
+        try:
+            with open(self._path(name), 'rb') as entry_file:
+                return pickle.load(entry_file)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            self._remove(name)
+            return None
+
+    def _remove(self, name):
+        self._index.pop(name, None)
+        try:
+            os.remove(self._path(name))
+        except FileNotFoundError:
+            pass
+
+    # Сохранённое расписание (CompactBoard) по ключу или None
+    def get(self, key):
+        name = _entry_name(key)
+        if name not in self._index:
+            return None
+        board = self._read(name)
+        if board is not None:
+            self._touch(name)
+        self._save_index()
+        return board
+
+    # Ближайшая запись с теми же настройками: (ключ, CompactBoard) или None
+    def nearest(self, key):
+        candidates = []
+        for name, entry in self._index.items():
+            distance = _distance(key, entry['key'])
+            if distance is not None and 0 < distance <= self.near_distance:
+                candidates.append((distance, -entry['used'], name))
+        for distance, used, name in sorted(candidates):
+            board = self._read(name)
+            if board is not None:
+                key = self._index[name]['key']
+                self._touch(name)
+                self._save_index()
+                return key, board
+        return None
+
+    def put(self, key, board):
+        name = _entry_name(key)
+        descriptor, temporary = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(descriptor, 'wb') as entry_file:
+            pickle.dump(board, entry_file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary, self._path(name))
+        self._index[name] = {'key': key, 'size': os.path.getsize(self._path(name)), 'used': 0}
+        self._touch(name)
+        self._evict()
+        self._save_index()
+
+    # Удаление давно не использованных записей до лимитов
+    def _evict(self):
+        total = sum(entry['size'] for entry in self._index.values())
+        for name in sorted(self._index, key=lambda name: self._index[name]['used']):
+            if len(self._index) <= self.max_entries and total <= self.max_bytes:
+                break
+            total -= self._index[name]['size']
+            self._remove(name)
+
+    def clear(self):
+        for name in list(self._index):
+            self._remove(name)
+        self._save_index()
+
+    # genetic_optimizer с кэшем; результат - ScheduleBoard, как у core.genetic_optimizer
+    def genetic_optimizer(self, bus_count, type_a_drivers, type_b_drivers, current_date, backend='objects',
+                          population_size=POPULATION_SIZE_GA, generations=GENERATIONS_GA, on_generation=None,
+                          stopping=None, constraints=None):
+        key = cache_key(bus_count, type_a_drivers, type_b_drivers, current_date, backend,
+                        population_size, generations, constraints, stopping)
+        board = self.get(key)
+        if board is not None:
+            self._count(HIT)
+            if stopping is not None:
+                stopping.start()
+                stopping.finish(STOP_CACHED)
+            return board.for_date(current_date).to_schedule_board()
+        warm_start = None
+        near = self.nearest(key)
+        if near is not None:
+            warm_start = [adapt_board(near[1], type_a_drivers, type_b_drivers, current_date)]
+        self._count(MISS if warm_start is None else WARM)
+        schedule = genetic_optimizer(bus_count, type_a_drivers, type_b_drivers, current_date, backend,
+                                     population_size, generations, on_generation, stopping, constraints,
+                                     warm_start)
+        if stopping is None or stopping.reason not in (STOP_DEADLINE, STOP_CANCELLED):
+            self.put(key, from_schedule_board(schedule, current_date))
+        return schedule
+
+    def _count(self, outcome):
+        self.last_outcome = outcome
+        self.stats[outcome] += 1
@@ -0,0 +1,332 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Пакетный запуск генератора расписания без графического интерфейса.
+#
+# Файл заданий - CSV со столбцами bus_count, type_a, type_b, date (YYYY-MM-DD).
+# Пустые строки и строки, начинающиеся с '#', пропускаются; строка заголовка
+# необязательна. Результаты выводятся построчно в формате JSON Lines по мере
+# готовности каждого задания.
+#
+# Пример:
+#   python bus_schedule_cli.py jobs.csv -o results.jsonl --algorithm both --timings
+#
+# Режим диапазона дат считает все дни периода в пуле процессов, один раз для
+# каждого типа дня, и записывает объединённое расписание и сравнительный отчёт:
+#   python bus_schedule_cli.py --range 2024-03-01 2024-03-31 --buses 8 --type-a 10 --type-b 5
+#
+# Режим сети считает несколько линий и депо из JSON-файла (bus_schedule_network)
+# и выводит по строке JSON Lines на депо:
+#   python bus_schedule_cli.py --network network.json --date 2024-03-01
+
+import time
+
+_IMPORT_STARTED = time.perf_counter()
+
+import argparse
+import csv
+import datetime
+import functools
+import json
+import random
+import sys
+
+import bus_schedule_core as core
+import bus_schedule_cache as cache
+import bus_schedule_compact as compact
+import bus_schedule_days as days
+import bus_schedule_events as events
+import bus_schedule_exact as exact
+import bus_schedule_export as export
+import bus_schedule_network as network
+import bus_schedule_parallel as parallel
+import bus_schedule_profile as profile
+import bus_schedule_validate as validation
+
+_IMPORT_FINISHED = time.perf_counter()
+
+ALGORITHMS = {
+    'linear': ("Linear", core.create_linear_schedule),
+    'genetic': ("Genetic", core.genetic_optimizer),
+    'exact': ("Exact", exact.create_exact_schedule),
+}
+
+COMPACT_ALGORITHMS = {
+    'linear': ("Linear", compact.create_linear_schedule_compact),
+    'genetic': ("Genetic", compact.compact_genetic_optimizer),
+    'exact': ("Exact", exact.create_exact_schedule_compact),
+}
+
+# Представление расписания: objects - ScheduleBoard, compact - CompactBoard,
+# numpy - линейный алгоритм в CompactBoard и векторизованный генетический
+BACKENDS = core.GA_BACKENDS
+
+
+# Чтение заданий из файла
+def read_jobs(path):
+    with open(path, newline='') as jobs_file:
+        for line_number, row in enumerate(csv.reader(jobs_file), start=1):
+            if not row or not row[0].strip() or row[0].lstrip().startswith('#'):
+                continue
+            if row[0].strip() == 'bus_count':
+                continue
+            if len(row) != 4:
+                raise ValueError(f"{path}:{line_number}: ожидается 4 поля, получено {len(row)}")
+            bus_count, type_a, type_b, date = (value.strip() for value in row)
+            yield (int(bus_count), int(type_a), int(type_b),
+                   datetime.datetime.strptime(date, '%Y-%m-%d').date())
+
+
+# Выполнение одного задания всеми выбранными алгоритмами
+# stopping - аргументы core.EarlyStopping (patience, min_spread, time_budget) или None;
+# для каждого запуска генетического алгоритма создаётся свой объект, а его
+# отчёт (причина остановки и число поколений) добавляется в результат.
+# constraints - режим проверки расписания генетического алгоритма (core.GA_CONSTRAINTS);
+# validate - добавить в результат число нарушений каждого вида (bus_schedule_validate).
+# cache - bus_schedule_cache.ResultCache для генетического алгоритма или None;
+# итог обращения к кэшу (hit, warm, miss) добавляется в результат.
+# engine - 'events': прямой алгоритм и начальная популяция генетического
+# строятся дискретно-событийной моделью (bus_schedule_events).
+def run_job(index, job, algorithms, seed=None, include_schedule=True, islands=1, workers=None,
+            migration_interval=parallel.MIGRATION_INTERVAL_GA, backend='objects', stopping=None,
+            constraints=None, validate=False, cache=None, engine='loop'):
+    bus_count, type_a_drivers, type_b_drivers, current_date = job
+    for key in algorithms:
+        algorithm_name, algorithm = (ALGORITHMS if backend == 'objects' else COMPACT_ALGORITHMS)[key]
+        if engine == 'events' and key == 'linear':
+            algorithm = (events.simulate_linear_schedule if backend == 'objects'
+                         else events.simulate_linear_schedule_compact)
+        early_stopping = None
+        if key == 'genetic' and (backend == 'numpy' or stopping is not None or constraints is not None
+                                 or cache is not None or engine == 'events' or workers is not None):
+            early_stopping = None if stopping is None else core.EarlyStopping(**stopping)
+            optimizer = core.genetic_optimizer if cache is None else cache.genetic_optimizer
+            if engine == 'events':
+                optimizer = events.simulated_genetic_optimizer
+            # Начальная популяция в пуле процессов - только у обычного запуска
+            options = {'workers': workers} if optimizer is core.genetic_optimizer else {}
+            algorithm = functools.partial(optimizer, backend=backend, stopping=early_stopping,
+                                          constraints=constraints, **options)
+        if seed is not None:
+            random.seed(f"{seed}:{index}:{key}")
+        if key == 'genetic' and islands > 1:
+            algorithm = functools.partial(
+                parallel.island_genetic_optimizer, islands=islands, workers=workers,
+                migration_interval=migration_interval, compact=backend != 'objects',
+                seed=None if seed is None else f"{seed}:{index}")
+        started = time.perf_counter()
+        schedule = algorithm(bus_count, type_a_drivers, type_b_drivers, current_date)
+        elapsed = time.perf_counter() - started
+        if isinstance(schedule, compact.CompactBoard):
+            schedule = schedule.to_schedule_board()
+        result = {
+            'job': index,
+            'algorithm': algorithm_name,
+            'bus_count': bus_count,
+            'type_a': type_a_drivers,
+            'type_b': type_b_drivers,
+            'date': current_date.isoformat(),
+            'elapsed_ms': round(elapsed * 1000, 3),
+        }
+        if early_stopping is not None:
+            result['stopped_by'] = early_stopping.reason
+            result['generations'] = early_stopping.generations
+        if key == 'genetic' and cache is not None:
+            result['cache'] = cache.last_outcome
+        if validate:
+            violations = {kind: 0 for kind in validation.VIOLATION_KINDS}
+            for kind, *_ in validation.validate_schedule(schedule):
+                violations[kind] += 1
+            result['violations'] = violations
+        result.update(core.schedule_to_dict(schedule))
+        if not include_schedule:
+            del result['operators']
+        yield result
+
+
+def parse_date(value):
+    return datetime.datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Пакетная генерация расписания автобусов")
+    parser.add_argument('jobs', nargs='?', help="CSV-файл заданий: bus_count,type_a,type_b,date")
+    parser.add_argument('--range', nargs=2, metavar=('FIRST', 'LAST'), type=parse_date,
+                        help="рассчитать все даты диапазона вместо файла заданий")
+    parser.add_argument('--network', metavar='FILE', help="JSON-файл сети: линии и депо (bus_schedule_network)")
+    parser.add_argument('--date', type=parse_date, help="дата расписания для --network")
+    parser.add_argument('--buses', type=int, help="количество автобусов для --range")
+    parser.add_argument('--type-a', type=int, help="количество водителей типа A для --range")
+    parser.add_argument('--type-b', type=int, help="количество водителей типа B для --range")
+    parser.add_argument('--schedule-csv', default='days_schedule.csv', help="объединённое расписание по дням для --range")
+    parser.add_argument('--report-csv', default='days_comparison.csv', help="сравнительный отчёт по дням для --range")
+    parser.add_argument('--schedule-rows', help="для --range: расписание по строке на рейс или перерыв (CSV)")
+    parser.add_argument('--schedule-columns', help="для --range: расписание в двоичном колоночном формате")
+    parser.add_argument('-o', '--output', default='-', help="файл JSON Lines для результатов (по умолчанию stdout)")
+    parser.add_argument('--algorithm', choices=['linear', 'genetic', 'exact', 'both', 'all'], default='both',
+                        help="both - прямой и генетический, all - ещё и точный")
+    parser.add_argument('--seed', type=int, default=None, help="зерно генератора случайных чисел для воспроизводимости")
+    parser.add_argument('--islands', type=int, default=1, help="число островов генетического алгоритма (1 - обычный алгоритм)")
+    parser.add_argument('--workers', type=int, default=None, help="число процессов для островной модели (по умолчанию по числу ядер) "
+                             "и для начальной популяции генетического алгоритма с --backend objects")
+    parser.add_argument('--migration-interval', type=int, default=parallel.MIGRATION_INTERVAL_GA,
+                        help="обмен лучшими расписаниями между островами каждые N поколений")
+    parser.add_argument('--backend', choices=BACKENDS, default='objects',
+                        help="представление расписания: объекты, массивы минут или популяция в матрицах NumPy")
+    parser.add_argument('--patience', type=int, default=None,
+                        help="остановить генетический алгоритм после N поколений без улучшения")
+    parser.add_argument('--min-spread', type=float, default=None,
+                        help="остановить, когда разброс оценок в популяции не больше заданного")
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help="лимит времени генетического алгоритма в секундах; возвращается лучшее найденное")
+    parser.add_argument('--constraints', choices=['penalty', 'repair'], default=None,
+                        help="учёт нарушений в генетическом алгоритме: штраф к оценке или снятие рейсов с нарушениями")
+    parser.add_argument('--validate', action='store_true',
+                        help="добавить в результат число нарушений: пересечения, лимит часов, перерывы, чужие водители")
+    parser.add_argument('--cache', metavar='DIR', default=None,
+                        help="кэш результатов генетического алгоритма на диске: повторные задания возвращаются сразу")
+    parser.add_argument('--cache-entries', type=int, default=cache.DEFAULT_MAX_ENTRIES,
+                        help="наибольшее число расписаний в кэше (давно не использованные удаляются)")
+    parser.add_argument('--engine', choices=['loop', 'events'], default='loop',
+                        help="модель дня для прямого алгоритма и начальной популяции: цикл с шагом по волнам "
+                             "или дискретно-событийная")
+    parser.add_argument('--profile', default=None,
+                        help="записать замеры фаз алгоритмов и поколений в файл (только текущий процесс)")
+    parser.add_argument('--profile-format', choices=['json', 'chrome'], default='json',
+                        help="формат --profile: JSON или Chrome trace (chrome://tracing, Perfetto)")
+    parser.add_argument('--metrics-only', action='store_true', help="не выводить расписание водителей, только метрики")
+    parser.add_argument('--timings', action='store_true', help="вывести время импорта и выполнения в stderr")
+    args = parser.parse_args(argv)
+    if sum(mode is not None for mode in (args.jobs, args.range, args.network)) != 1:
+        parser.error("укажите файл заданий, --range или --network")
+    if args.network is not None and args.date is None:
+        parser.error("--network требует --date")
+    if args.range is not None and None in (args.buses, args.type_a, args.type_b):
+        parser.error("--range требует --buses, --type-a и --type-b")
+    args.stopping = None
+    if (args.patience, args.min_spread, args.time_budget) != (None, None, None):
+        if args.range is not None or args.islands > 1:
+            parser.error("--patience, --min-spread и --time-budget не поддерживаются с --range и --islands")
+        args.stopping = {'patience': args.patience, 'min_spread': args.min_spread, 'time_budget': args.time_budget}
+        try:
+            core.EarlyStopping(**args.stopping)
+        except ValueError as e:
+            parser.error(str(e))
+    if args.constraints is not None:
+        if args.range is not None or args.islands > 1:
+            parser.error("--constraints не поддерживается с --range и --islands")
+        if args.backend == 'numpy':
+            parser.error("--constraints не поддерживается с --backend numpy")
+    if args.cache is not None:
+        if args.range is not None or args.islands > 1:
+            parser.error("--cache не поддерживается с --range и --islands")
+        if args.cache_entries < 1:
+            parser.error("--cache-entries должно быть не меньше 1")
+    if args.engine == 'events' and (args.range is not None or args.islands > 1 or args.cache is not None):
+        parser.error("--engine events не поддерживается с --range, --islands и --cache")
+    return args
+
+
+# Режим диапазона дат: дни одного типа считаются один раз
+def run_range(args, algorithms):
+    backend = 'compact' if args.backend == 'objects' else args.backend
+    first_date, last_date = args.range
+    results, computed = days.schedule_date_range(first_date, last_date, args.buses, args.type_a, args.type_b,
+                                                 algorithms, backend, args.workers, args.seed)
+    days.export_days_to_csv(results, args.schedule_csv)
+    days.export_days_comparison_to_csv(results, args.report_csv)
+    if args.schedule_rows:
+        export.export_rows_to_csv(export.days_boards(results), args.schedule_rows)
+    if args.schedule_columns:
+        export.export_schedule_columns(export.days_boards(results), args.schedule_columns)
+    print(f"days: {len(results)}, computed: {computed}, schedule: {args.schedule_csv}, report: {args.report_csv}",
+          file=sys.stderr)
+
+
+# Режим сети: строка JSON Lines на каждое депо
+def run_network(args):
+    try:
+        routes, depots = network.load_network(args.network)
+    except ValueError as e:
+        raise SystemExit(f"Неверное описание сети {args.network}: {e}")
+    started = time.perf_counter()
+    results = network.schedule_network(routes, depots, args.date, workers=args.workers, seed=args.seed)
+    elapsed = time.perf_counter() - started
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        for depot, depot_result in results.items():
+            schedule = depot_result['schedule']
+            result = {
+                'depot': depot,
+                'date': args.date.isoformat(),
+                'elapsed_ms': round(elapsed * 1000, 3),
+                'drivers': depot_result['drivers'],
+                'shared_drivers': depot_result['shared_drivers'],
+                'routes': depot_result['routes'],
+            }
+            if args.validate:
+                violations = {kind: 0 for kind in validation.VIOLATION_KINDS}
+                for kind, *_ in validation.validate_schedule(schedule):
+                    violations[kind] += 1
+                result['violations'] = violations
+            result.update(core.schedule_to_dict(schedule))
+            if args.metrics_only:
+                del result['operators']
+            output.write(json.dumps(result, ensure_ascii=False) + '\n')
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.backend == 'numpy' and args.islands > 1:
+        raise SystemExit("--islands не поддерживается с --backend numpy")
+    algorithms = {'both': ['linear', 'genetic'], 'all': ['linear', 'genetic', 'exact']}.get(args.algorithm, [args.algorithm])
+    started = time.perf_counter()
+    if args.network is not None:
+        run_network(args)
+        if args.timings:
+            print(f"total: {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+        return 0
+    if args.range is not None:
+        run_range(args, algorithms)
+        if args.timings:
+            print(f"total: {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+        return 0
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    profiler = profile.Profiler() if args.profile else None
+    result_cache = None if args.cache is None else cache.ResultCache(args.cache, args.cache_entries)
+    jobs_done = 0
+    try:
+        if profiler is not None:
+            profiler.__enter__()
+        for index, job in enumerate(read_jobs(args.jobs)):
+            for result in run_job(index, job, algorithms, args.seed, not args.metrics_only,
+                                  args.islands, args.workers, args.migration_interval, args.backend,
+                                  args.stopping, args.constraints, args.validate, result_cache,
+                                  args.engine):
+                output.write(json.dumps(result, ensure_ascii=False) + '\n')
+                output.flush()
+            jobs_done += 1
+    finally:
+        if profiler is not None:
+            profiler.__exit__(None, None, None)
+        if output is not sys.stdout:
+            output.close()
+    if profiler is not None:
+        if args.profile_format == 'chrome':
+            profiler.save_chrome_trace(args.profile)
+        else:
+            profiler.save_json(args.profile)
+    if args.timings:
+        print(f"import scheduling modules: {(_IMPORT_FINISHED - _IMPORT_STARTED) * 1000:.1f} ms", file=sys.stderr)
+        print(f"jobs: {jobs_done}, total: {(time.perf_counter() - started) * 1000:.1f} ms", file=sys.stderr)
+        print(f"PyQt6 loaded: {'PyQt6' in sys.modules}", file=sys.stderr)
+        cache_stats = core.ScheduleBoard.cache_stats
+        print(f"fitness cache (this process): hits={cache_stats['hits']}, misses={cache_stats['misses']}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
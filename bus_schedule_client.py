@@ -0,0 +1,156 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Клиент и нагрузочный тест локальной службы расписания (bus_schedule_service).
+#
+# request_schedule читает потоковый ответ POST /schedule и возвращает строки
+# JSON Lines по мере прихода; load_test отправляет requests запросов не больше
+# чем по concurrency одновременно и сообщает пропускную способность, задержки
+# первого и последнего результата и метрики службы после теста. Задания
+# выбираются по кругу из distinct вариантов, так что при distinct меньше
+# concurrency одинаковые одновременные запросы объединяются службой.
+#
+# Пример:
+#   python bus_schedule_client.py --requests 200 --concurrency 32 --distinct 4 --algorithm linear
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+from bus_schedule_service import DEFAULT_HOST, DEFAULT_PORT
+
+
+class ServiceError(Exception):
+    def __init__(self, status, message):
+        super().__init__(f"{status}: {message}")
+        self.status = status
+
+
+async def _open(host, port, method, path, payload=None):
+    reader, writer = await asyncio.open_connection(host, port)
+    body = b'' if payload is None else json.dumps(payload).encode('utf-8')
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                  f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode('latin-1') + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    headers = {}
+    while True:
+        line = (await reader.readline()).decode('latin-1')
+        if line in ('\r\n', '\n', ''):
+            break
+        name, _, value = line.partition(':')
+        headers[name.strip().lower()] = value.strip()
+    return reader, writer, status, headers
+
+
+async def _close(writer):
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except ConnectionError:
+        pass
+
+
+# Результаты POST /schedule по мере готовности (асинхронный генератор словарей)
+async def request_schedule(payload, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    reader, writer, status, headers = await _open(host, port, 'POST', '/schedule', payload)
+    try:
+        if headers.get('transfer-encoding') != 'chunked':
+            body = await reader.read()
+            raise ServiceError(status, json.loads(body or b'{}').get('error', body.decode('utf-8', 'replace')))
+        while True:
+            size = int((await reader.readline()).strip(), 16)
+            if not size:
+                break
+            chunk = await reader.readexactly(size)
+            await reader.readexactly(2)
+            yield json.loads(chunk)
+    finally:
+        await _close(writer)
+
+
+# GET path (/metrics, /health) - словарь JSON
+async def request_json(path, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    reader, writer, status, headers = await _open(host, port, 'GET', path)
+    try:
+        body = json.loads(await reader.read())
+    finally:
+        await _close(writer)
+    if status != 200:
+        raise ServiceError(status, body.get('error'))
+    return body
+
+
+def _percentiles(values):
+    values = sorted(values)
+    if not values:
+        return {}
+    return {name: round(values[min(len(values) - 1, int(share * len(values)))] * 1000, 3)
+            for name, share in (('p50', 0.5), ('p95', 0.95), ('p99', 0.99), ('max', 1.0))}
+
+
+# Нагрузочный тест: payloads - варианты заданий, выбираются по кругу
+async def load_test(payloads, requests=100, concurrency=16, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    limit = asyncio.Semaphore(concurrency)
+    first_latencies = []
+    latencies = []
+    failures = {}
+
+    async def one(number):
+        async with limit:
+            started = time.perf_counter()
+            first = None
+            try:
+                async for _ in request_schedule(payloads[number % len(payloads)], host, port):
+                    if first is None:
+                        first = time.perf_counter() - started
+            except (ServiceError, ConnectionError, ValueError) as e:
+                key = str(e.status) if isinstance(e, ServiceError) else type(e).__name__
+                failures[key] = failures.get(key, 0) + 1
+                return
+            first_latencies.append(first if first is not None else time.perf_counter() - started)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(number) for number in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        'requests': requests,
+        'concurrency': concurrency,
+        'succeeded': len(latencies),
+        'failures': failures,
+        'elapsed_s': round(elapsed, 3),
+        'requests_per_s': round(len(latencies) / elapsed, 1) if elapsed else None,
+        'first_result_ms': _percentiles(first_latencies),
+        'latency_ms': _percentiles(latencies),
+        'service': await request_json('/metrics', host, port),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Нагрузочный тест локальной службы расписания")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--requests', type=int, default=100, help="число запросов")
+    parser.add_argument('--concurrency', type=int, default=16, help="одновременных запросов")
+    parser.add_argument('--distinct', type=int, default=4, help="число различных заданий")
+    parser.add_argument('--algorithm', default='linear', help="алгоритм в запросах (как в службе)")
+    parser.add_argument('--buses', type=int, default=8)
+    parser.add_argument('--type-a', type=int, default=10)
+    parser.add_argument('--type-b', type=int, default=5)
+    parser.add_argument('--date', default='2024-03-04')
+    args = parser.parse_args(argv)
+    if min(args.requests, args.concurrency, args.distinct) < 1:
+        parser.error("--requests, --concurrency и --distinct должны быть не меньше 1")
+    payloads = [{'bus_count': args.buses + number, 'type_a': args.type_a, 'type_b': args.type_b,
+                 'date': args.date, 'algorithm': args.algorithm, 'seed': 0, 'metrics_only': True}
+                for number in range(args.distinct)]
+    report = asyncio.run(load_test(payloads, args.requests, args.concurrency, args.host, args.port))
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 0 if report['succeeded'] == args.requests else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
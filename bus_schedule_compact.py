@@ -0,0 +1,401 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Компактное представление расписания: минуты от начала смены в массивах.
+#
+# Вместо объектов Itinerary и BusOperator с datetime/timedelta расписание
+# хранится в нескольких массивах array:
+#   starts, ends, drivers             - рейсы (минуты от START_OF_SHIFT и индекс водителя в roster);
+#   peaks                             - признак часа пик для каждого рейса, вычисляется один раз;
+#   operators, operator_types         - водители расписания (индекс в roster и тип b'A'/b'B');
+#   offsets                           - границы записей каждого водителя (как в CSR-матрице);
+#   entry_starts, entry_ends, entry_kinds - рабочие интервалы и перерывы водителей.
+# roster - общий для всех расписаний задания кортеж идентификаторов водителей.
+#
+# Генераторы повторяют логику create_linear_schedule и
+# generate_initial_schedule шаг в шаг, поэтому при одинаковом seed дают те же
+# назначения. В datetime расписание переводится только для экспорта и
+# отображения (to_schedule_board).
+
+import copy
+import datetime
+import random
+from array import array
+
+from bus_schedule_core import (
+    START_OF_SHIFT, MORNING_PEAK_START, MORNING_PEAK_END, EVENING_PEAK_START,
+    EVENING_PEAK_END, MIN_CHANGE_TIME, MAX_CHANGE_TIME,
+    TYPE_B_BREAK_INTERVAL, TYPE_B_LONG_BREAK, MIN_ROUTE_TIME, MAX_ROUTE_TIME,
+    PEAK_PERCENTAGE, POPULATION_SIZE_GA, GENERATIONS_GA, MUTATION_RATE_GA,
+    TYPE_A_MINUTES, TYPE_B_MINUTES, Itinerary, BusOperator, ScheduleBoard,
+    DriverAvailabilityIndex, is_off_day, evolve_population, constraint_hooks, current_profiler,
+)
+
+ROUTE = 0
+BREAK = 1
+KIND_NAMES = ('route', 'break')
+MINUTES_PER_DAY = 24 * 60
+
+
+def _minutes_of_day(time):
+    return time.hour * 60 + time.minute
+
+
+SHIFT_START_MINUTE = _minutes_of_day(START_OF_SHIFT)
+# Генераторы работают, пока текущее время меньше 23:59 дня смены
+DAY_END_MINUTE = _minutes_of_day(datetime.time(23, 59)) - SHIFT_START_MINUTE
+
+
+# Таблица часа пик по минутам от начала смены: проверка - одно обращение по индексу
+def _build_peak_table():
+    morning = range(_minutes_of_day(MORNING_PEAK_START), _minutes_of_day(MORNING_PEAK_END))
+    evening = range(_minutes_of_day(EVENING_PEAK_START), _minutes_of_day(EVENING_PEAK_END))
+    table = bytearray(MINUTES_PER_DAY)
+    for offset in range(MINUTES_PER_DAY):
+        minute = (SHIFT_START_MINUTE + offset) % MINUTES_PER_DAY
+        table[offset] = minute in morning or minute in evening
+    return bytes(table)
+
+
+PEAK_BY_OFFSET = _build_peak_table()
+
+
+# Проверка на час пик для минуты от начала смены
+def is_peak_minute(offset):
+    return PEAK_BY_OFFSET[offset % MINUTES_PER_DAY] == 1
+
+
+# Признаки часа пик для списка начал рейсов (1 - рейс начинается в час пик)
+def peak_flags(starts):
+    return bytearray(PEAK_BY_OFFSET[offset % MINUTES_PER_DAY] for offset in starts)
+
+
+# Идентификаторы водителей задания: сначала тип A, затем тип B
+def make_roster(type_a_drivers, type_b_drivers):
+    return tuple([f'A{i+1}' for i in range(type_a_drivers)] + [f'B{i+1}' for i in range(type_b_drivers)])
+
+
+class CompactBoard:
+    __slots__ = ('current_date', 'roster', 'starts', 'ends', 'drivers', 'peaks', 'operators',
+                 'operator_types', 'offsets', 'entry_starts', 'entry_ends', 'entry_kinds',
+                 '_statistics', '_fitness', '_violations')
+
+    def __init__(self, current_date, roster):
+        self.current_date = current_date
+        self.roster = roster
+        self.starts = array('h')
+        self.ends = array('h')
+        self.drivers = array('h')
+        self.peaks = bytearray()
+        self.operators = array('h')
+        self.operator_types = bytearray()
+        self.offsets = array('i', [0])
+        self.entry_starts = array('h')
+        self.entry_ends = array('h')
+        self.entry_kinds = bytearray()
+        self._statistics = None
+        self._fitness = None
+        self._violations = None
+
+    def __repr__(self):
+        return f"CompactBoard(date={self.current_date}, itineraries={len(self.starts)}, operators={len(self.operators)})"
+
+    def __getstate__(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def __setstate__(self, state):
+        for name, value in state.items():
+            setattr(self, name, value)
+
+    def invalidate(self):
+        self._statistics = None
+        self._fitness = None
+        self._violations = None
+
+    # Копия для мутации: alter_compact_schedule меняет только operator_types,
+    # остальные массивы не меняются на месте и остаются общими
+    def copy(self):
+        board = copy.copy(self)
+        board.operator_types = bytearray(self.operator_types)
+        return board
+
+    # То же расписание на другую дату: минуты от начала смены не зависят от
+    # даты, поэтому массивы общие и не копируются
+    def for_date(self, current_date):
+        board = copy.copy(self)
+        board.current_date = current_date
+        return board
+
+    # Та же тройка, что и ScheduleBoard.calculate_statistics, с тем же кэшем
+    def calculate_statistics(self):
+        if self._statistics is not None:
+            ScheduleBoard.cache_stats['hits'] += 1
+            return self._statistics
+        ScheduleBoard.cache_stats['misses'] += 1
+        self._statistics = (len(self.starts), self.peaks.count(1), len(self.operators))
+        return self._statistics
+
+    # Записи водителя с позиции index: (начало, конец, вид) в минутах
+    def operator_entries(self, index):
+        first, last = self.offsets[index], self.offsets[index + 1]
+        return zip(self.entry_starts[first:last], self.entry_ends[first:last], self.entry_kinds[first:last])
+
+    # Перевод в ScheduleBoard с datetime - только для экспорта и отображения
+    def to_schedule_board(self):
+        base = datetime.datetime.combine(self.current_date, START_OF_SHIFT)
+        moments = {}
+
+        def moment(offset):
+            value = moments.get(offset)
+            if value is None:
+                value = moments[offset] = base + datetime.timedelta(minutes=offset)
+            return value
+
+        board = ScheduleBoard()
+        for start, end, driver in zip(self.starts, self.ends, self.drivers):
+            board.itineraries.append(Itinerary(moment(start), end - start, self.roster[driver]))
+        for index, roster_index in enumerate(self.operators):
+            operator = BusOperator(chr(self.operator_types[index]), self.roster[roster_index])
+            worked = 0
+            for start, end, kind in self.operator_entries(index):
+                operator.schedule.append((moment(start), moment(end), KIND_NAMES[kind]))
+                worked += end - start
+            operator.total_time = datetime.timedelta(minutes=worked)
+            board.operators.append(operator)
+        return board
+
+
+# Перевод ScheduleBoard в компактное представление
+def from_schedule_board(schedule, current_date):
+    base = datetime.datetime.combine(current_date, START_OF_SHIFT)
+    roster = []
+    positions = {}
+
+    def roster_index(operator_id):
+        if operator_id not in positions:
+            positions[operator_id] = len(roster)
+            roster.append(operator_id)
+        return positions[operator_id]
+
+    def offset(moment):
+        return int((moment - base).total_seconds() // 60)
+
+    for operator in schedule.operators:
+        roster_index(operator.id)
+    board = CompactBoard(current_date, None)
+    for itinerary in schedule.itineraries:
+        board.starts.append(offset(itinerary.start))
+        board.ends.append(offset(itinerary.end))
+        board.drivers.append(roster_index(itinerary.driver))
+    board.peaks = peak_flags(board.starts)
+    for operator in schedule.operators:
+        board.operators.append(roster_index(operator.id))
+        board.operator_types += operator.type.encode()
+        for start, end, kind in operator.schedule:
+            board.entry_starts.append(offset(start))
+            board.entry_ends.append(offset(end))
+            board.entry_kinds.append(KIND_NAMES.index(kind))
+        board.offsets.append(len(board.entry_starts))
+    board.roster = tuple(roster)
+    return board
+
+
+# Состояние водителей во время генерации: всё в минутах от начала смены
+class _DriverState:
+    __slots__ = ('entries', 'total', 'last_end', 'last_rest')
+
+    def __init__(self, count):
+        self.entries = [[] for _ in range(count)]
+        self.total = [0] * count
+        self.last_end = [0] * count
+        # В BusOperator last_rest начинается с datetime.date.min, то есть
+        # задолго до начала смены
+        self.last_rest = [-(1 << 30)] * count
+
+    def add(self, driver, start, end, kind):
+        self.entries[driver].append((start, end, kind))
+        self.total[driver] += end - start
+        self.last_end[driver] = end
+
+    def build(self, board, order):
+        for driver in order:
+            board.operators.append(driver)
+            for start, end, kind in self.entries[driver]:
+                board.entry_starts.append(start)
+                board.entry_ends.append(end)
+                board.entry_kinds.append(kind)
+            board.offsets.append(len(board.entry_starts))
+
+
+def _slot_count(bus_count, current_time, off_day):
+    if is_peak_minute(current_time) and not off_day:
+        return int(bus_count*PEAK_PERCENTAGE), True
+    passenger_percent = 1 - PEAK_PERCENTAGE if not off_day else 1
+    return int(bus_count * passenger_percent), False
+
+
+# Прямой алгоритм в компактном представлении (повторяет create_linear_schedule)
+def create_linear_schedule_compact(bus_count, type_a_drivers, type_b_drivers, current_date):
+    profiler = current_profiler()
+    if profiler is not None:
+        started = profiler.clock()
+    roster = make_roster(type_a_drivers, type_b_drivers)
+    board = CompactBoard(current_date, roster)
+    state = _DriverState(len(roster))
+    index = DriverAvailabilityIndex(type_a_drivers, type_b_drivers)
+    off_day = is_off_day(current_date)
+    current_time = 0
+    find_type_a, find_break_due, last_type_b = index.find_type_a, index.find_break_due, index.last_type_b
+    add_route = _add_route
+    if profiler is not None:
+        # Те же фазы, что у create_linear_schedule
+        find_type_a = profiler.accumulate('select_driver', find_type_a)
+        find_break_due = profiler.accumulate('select_driver', find_break_due)
+        last_type_b = profiler.accumulate('select_driver', last_type_b)
+        add_route = profiler.accumulate('assign_route', add_route)
+        profiler.span('setup', 'linear', started)
+
+    while current_time < DAY_END_MINUTE:
+        route_duration = random.randint(MIN_ROUTE_TIME, MAX_ROUTE_TIME)
+        slots, peak = _slot_count(bus_count, current_time, off_day)
+        for _ in range(slots):
+            if not index.has_available():
+                break
+            # Пытаемся найти свободного водителя типа А
+            operator = find_type_a(current_time, TYPE_A_MINUTES - route_duration)
+            if operator is not None:
+                add_route(board, state, operator, current_time, route_duration)
+                index.add_route(operator, current_time, current_time + route_duration)
+                exhausted = index.totals[operator] >= TYPE_A_MINUTES
+                if exhausted:
+                    index.remove(operator)
+                # Вне часа пик исходный алгоритм продолжает поиск водителя типа B
+                # и после назначения водителя типа A
+                if peak or exhausted:
+                    continue
+
+            due = find_break_due(current_time)
+            if due is not None:
+                break_end_time = current_time + TYPE_B_LONG_BREAK
+                state.add(due, current_time, break_end_time, BREAK)
+                index.add_break(due, current_time, break_end_time)
+                current_time = break_end_time
+                operator = due
+            elif index.available_b:
+                operator = last_type_b()
+            if operator is not None:
+                add_route(board, state, operator, current_time, route_duration)
+                index.add_route(operator, current_time, current_time + route_duration)
+                if operator >= type_a_drivers and index.totals[operator] >= TYPE_B_MINUTES:
+                    index.remove(operator)
+        current_time += route_duration + random.randint(MIN_CHANGE_TIME, MAX_CHANGE_TIME)
+
+    state.build(board, range(len(roster)))
+    board.operator_types += b'A' * type_a_drivers + b'B' * type_b_drivers
+    if profiler is not None:
+        profiler.span('create_linear_schedule', 'linear', started,
+                      phases=profiler.take('select_driver', 'assign_route'),
+                      args={'bus_count': bus_count, 'itineraries': len(board.starts), 'backend': 'compact'})
+    return board
+
+
+def _add_route(board, state, driver, start, duration):
+    board.starts.append(start)
+    board.ends.append(start + duration)
+    board.drivers.append(driver)
+    board.peaks.append(PEAK_BY_OFFSET[start % MINUTES_PER_DAY])
+    state.add(driver, start, start + duration, ROUTE)
+
+
+# Случайное расписание в компактном представлении (повторяет generate_initial_schedule)
+def generate_initial_schedule_compact(bus_count, type_a_drivers, type_b_drivers, current_date):
+    roster = make_roster(type_a_drivers, type_b_drivers)
+    board = CompactBoard(current_date, roster)
+    state = _DriverState(len(roster))
+    off_day = is_off_day(current_date)
+    drivers = list(range(len(roster)))
+    current_time = 0
+
+    while current_time < DAY_END_MINUTE:
+        route_duration = random.randint(MIN_ROUTE_TIME, MAX_ROUTE_TIME)
+        slots, _ = _slot_count(bus_count, current_time, off_day)
+        for _ in range(slots):
+            if not drivers:
+                break
+            driver = random.choice(drivers)
+            if driver < type_a_drivers:
+                if current_time >= state.last_end[driver] and state.total[driver] + route_duration <= TYPE_A_MINUTES:
+                    _add_route(board, state, driver, current_time, route_duration)
+                else:
+                    drivers.remove(driver)
+            elif state.total[driver] >= TYPE_B_BREAK_INTERVAL and state.last_rest[driver] <= current_time - TYPE_B_BREAK_INTERVAL:
+                break_end_time = current_time + TYPE_B_LONG_BREAK
+                state.add(driver, current_time, break_end_time, BREAK)
+                state.last_rest[driver] = break_end_time
+                current_time = break_end_time
+            elif current_time >= state.last_end[driver]:
+                _add_route(board, state, driver, current_time, route_duration)
+        current_time += route_duration + random.randint(MIN_CHANGE_TIME, MAX_CHANGE_TIME)
+
+    state.build(board, drivers)
+    board.operator_types += bytes(ord('A') if driver < type_a_drivers else ord('B') for driver in drivers)
+    return board
+
+
+# Скрещивание: срезы массивов родителей склеиваются без создания объектов
+def combine_compact_schedules(schedule1, schedule2):
+    child = CompactBoard(schedule1.current_date, schedule1.roster)
+    split_point = random.randint(0, min(len(schedule1.starts), len(schedule2.starts)))
+    child.starts = schedule1.starts[:split_point] + schedule2.starts[split_point:]
+    child.ends = schedule1.ends[:split_point] + schedule2.ends[split_point:]
+    child.drivers = schedule1.drivers[:split_point] + schedule2.drivers[split_point:]
+    child.peaks = schedule1.peaks[:split_point] + schedule2.peaks[split_point:]
+
+    split_point = random.randint(0, min(len(schedule1.operators), len(schedule2.operators)))
+    child.operators = schedule1.operators[:split_point] + schedule2.operators[split_point:]
+    child.operator_types = schedule1.operator_types[:split_point] + schedule2.operator_types[split_point:]
+    first_end = schedule1.offsets[split_point]
+    second_start = schedule2.offsets[split_point]
+    child.entry_starts = schedule1.entry_starts[:first_end] + schedule2.entry_starts[second_start:]
+    child.entry_ends = schedule1.entry_ends[:first_end] + schedule2.entry_ends[second_start:]
+    child.entry_kinds = schedule1.entry_kinds[:first_end] + schedule2.entry_kinds[second_start:]
+    shift = first_end - second_start
+    child.offsets = schedule1.offsets[:split_point + 1] + array('i', [offset + shift for offset in schedule2.offsets[split_point + 1:]])
+    return child
+
+
+# Мутация в компактном представлении
+def alter_compact_schedule(schedule):
+    if random.random() < MUTATION_RATE_GA and schedule.starts:
+        random.randint(0, len(schedule.starts)-1)
+        # alter_schedule сравнивает новое время с окном от datetime.date.min,
+        # поэтому сдвиг рейса там никогда не применяется. Случайное число
+        # расходуется так же, чтобы результаты совпадали при одинаковом seed.
+        random.randint(-30, 30)
+    if schedule.operators:
+        index_driver_mutate = random.randint(0, len(schedule.operators) - 1)
+        new_type = ord(random.choice(['A', 'B']))
+        if schedule.operator_types[index_driver_mutate] != new_type:
+            schedule.operator_types[index_driver_mutate] = new_type
+            schedule.invalidate()
+    return schedule
+
+
+# Генетический алгоритм в компактном представлении; constraints и warm_start - как в genetic_optimizer
+def compact_genetic_optimizer(bus_count, type_a_drivers, type_b_drivers, current_date,
+                              population_size=POPULATION_SIZE_GA, generations=GENERATIONS_GA, on_generation=None,
+                              constraints=None, warm_start=None):
+    profiler = current_profiler()
+    if profiler is not None:
+        started = profiler.clock()
+    assess, alter, prepare = constraint_hooks(constraints, alter_compact_schedule)
+    population = list(warm_start or ())[:population_size]
+    population += [generate_initial_schedule_compact(bus_count, type_a_drivers, type_b_drivers, current_date)
+                   for _ in range(population_size - len(population))]
+    if prepare is not None:
+        population = [prepare(board) for board in population]
+    if profiler is not None:
+        profiler.span('initial_population', 'genetic', started, args={'size': population_size})
+    population = evolve_population(population, generations, population_size,
+                                   combine_compact_schedules, alter, on_generation, assess)
+    return population[0]
@@ -0,0 +1,789 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Ядро генератора расписания: структуры данных, алгоритмы и экспорт.
+# Модуль не зависит от PyQt6 и может импортироваться из пакетных заданий.
+
+import datetime
+import heapq
+import random
+import csv
+import time
+
+# Константы
+START_OF_SHIFT = datetime.time(6, 0)
+END_OF_SHIFT = datetime.time(3, 0)
+MORNING_PEAK_START = datetime.time(7, 0)
+MORNING_PEAK_END = datetime.time(9, 0)
+EVENING_PEAK_START = datetime.time(17, 0)
+EVENING_PEAK_END = datetime.time(19, 0)
+MIN_CHANGE_TIME = 10
+MAX_CHANGE_TIME = 15
+TYPE_A_HOURS = 8
+TYPE_A_LUNCH = 60
+TYPE_B_HOURS = 12
+TYPE_B_SHORT_BREAK = 15
+TYPE_B_BREAK_INTERVAL = 120
+TYPE_B_LONG_BREAK = 40
+MIN_ROUTE_TIME = 65
+MAX_ROUTE_TIME = 75
+TOTAL_PASSENGERS = 1000
+PEAK_PERCENTAGE = 0.7
+TYPE_A_MINUTES = TYPE_A_HOURS * 60
+TYPE_B_MINUTES = TYPE_B_HOURS * 60
+ONE_MINUTE = datetime.timedelta(minutes=1)
+
+# Параметры генетического алгоритма
+POPULATION_SIZE_GA = 100
+GENERATIONS_GA = 250
+MUTATION_RATE_GA = 0.1
+
+# Дни недели
+REGULAR_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]
+OFF_DAYS = ["Saturday", "Sunday"]
+
+# Структуры данных
+class Itinerary:
+    def __init__(self, start_time, duration, operator_id):
+        self.start = start_time
+        self.end = start_time + datetime.timedelta(minutes=duration)
+        self.driver = operator_id
+
+    def __repr__(self):
+         return f"Itinerary(start={self.start.strftime('%H:%M')}, end={self.end.strftime('%H:%M')}, driver={self.driver})"
+
+class BusOperator:
+    def __init__(self, operator_type, operator_id):
+        self.type = operator_type
+        self.schedule = []
+        self.total_time = datetime.timedelta()
+        self.last_rest = datetime.datetime.combine(datetime.date.min, START_OF_SHIFT)
+        self.id = operator_id
+
+    def __repr__(self):
+        return f"BusOperator(id={self.id}, type={self.type}, schedule={len(self.schedule)} shifts, worktime = {self.total_time})"
+
+    # Копия водителя с другим типом. Расписания генетического алгоритма делят
+    # объекты водителей, поэтому мутация меняет копию, а не общий объект.
+    def with_type(self, operator_type):
+        operator = BusOperator(operator_type, self.id)
+        operator.schedule = list(self.schedule)
+        operator.total_time = self.total_time
+        operator.last_rest = self.last_rest
+        return operator
+
+class ScheduleBoard:
+    # Счётчики обращений к кэшу статистики (общие для всех расписаний процесса)
+    cache_stats = {'hits': 0, 'misses': 0}
+
+    def __init__(self):
+        self.itineraries = []
+        self.operators = []
+        self._statistics = None
+        self._fitness = None
+        self._violations = None  # число нарушений, кэш bus_schedule_validate
+
+    def add_itinerary(self, itinerary):
+        self.itineraries.append(itinerary)
+        self.invalidate()
+
+    def add_operator(self, operator):
+        self.operators.append(operator)
+        self.invalidate()
+
+    # Новое расписание с теми же рейсами и водителями: списки новые, объекты общие
+    def copy(self):
+        board = ScheduleBoard()
+        board.itineraries = list(self.itineraries)
+        board.operators = list(self.operators)
+        board._statistics = self._statistics
+        board._fitness = self._fitness
+        board._violations = self._violations
+        return board
+
+    # Сброс кэша. Вызывается при любом изменении itineraries или operators;
+    # код, меняющий эти списки напрямую, должен вызывать его сам.
+    def invalidate(self):
+        self._statistics = None
+        self._fitness = None
+        self._violations = None
+
+    def calculate_statistics(self):
+        if self._statistics is not None:
+            ScheduleBoard.cache_stats['hits'] += 1
+            return self._statistics
+        ScheduleBoard.cache_stats['misses'] += 1
+        peak_itineraries = 0
+        for itinerary in self.itineraries:
+            if (
+                (itinerary.start.time() >= MORNING_PEAK_START and itinerary.start.time() < MORNING_PEAK_END) or
+                (itinerary.start.time() >= EVENING_PEAK_START and itinerary.start.time() < EVENING_PEAK_END)
+                ):
+                peak_itineraries += 1
+        unique_drivers = len(self.operators)
+        total_itineraries = len(self.itineraries)
+        self._statistics = (total_itineraries, peak_itineraries, unique_drivers)
+        return self._statistics
+
+# Сброс счётчиков кэша статистики
+def reset_cache_stats():
+    ScheduleBoard.cache_stats['hits'] = 0
+    ScheduleBoard.cache_stats['misses'] = 0
+
+# Текущий профилировщик (bus_schedule_profile.Profiler) или None.
+# Алгоритмы проверяют его один раз при входе; если он не задан, замеров нет.
+_profiler = None
+
+
+def current_profiler():
+    return _profiler
+
+
+# Установка профилировщика; возвращает предыдущий
+def set_profiler(profiler):
+    global _profiler
+    previous, _profiler = _profiler, profiler
+    return previous
+
+# Индекс доступности водителей для прямого алгоритма.
+#
+# Водители нумеруются подряд: сначала тип A, затем тип B. Время и отработанные
+# минуты хранятся как целые минуты от начала смены. Выбор водителя стоит
+# O(log n) вместо просмотра списков:
+#   - свободные водители типа A лежат в дереве отрезков по минимуму
+#     отработанного времени, поэтому первый по порядку водитель, которому хватает
+#     лимита, находится спуском по дереву; занятые ждут в куче по времени
+#     освобождения;
+#   - водители типа B, отработавшие TYPE_B_BREAK_INTERVAL, ждут в куче по времени,
+#     когда им положен перерыв, а затем попадают в кучу по номеру;
+#   - куча по убыванию номера даёт последнего доступного водителя типа B.
+# Удалённые водители вычищаются из куч лениво.
+class DriverAvailabilityIndex:
+    _INFINITY = float('inf')
+
+    def __init__(self, type_a_drivers, type_b_drivers):
+        count = type_a_drivers + type_b_drivers
+        self.type_a_drivers = type_a_drivers
+        self.available_a = type_a_drivers
+        self.available_b = type_b_drivers
+        self.totals = [0] * count
+        self.last_end = [0] * count
+        # Как BusOperator.last_rest (datetime.date.min) - задолго до начала смены
+        self.last_rest = [-(1 << 30)] * count
+        self._available = [True] * count
+        self._break_tracked = [False] * count
+
+        size = 1
+        while size < type_a_drivers:
+            size *= 2
+        self._size = size
+        self._tree = [self._INFINITY] * (2 * size)
+        for driver in range(type_a_drivers):
+            self._tree[size + driver] = 0
+        for node in range(size - 1, 0, -1):
+            self._tree[node] = min(self._tree[2 * node], self._tree[2 * node + 1])
+        self._busy_a = []
+
+        self._pending_breaks = []
+        self._due_breaks = []
+        self._last_b = [-driver for driver in range(type_a_drivers, count)]
+        heapq.heapify(self._last_b)
+
+    def has_available(self):
+        return self.available_a > 0 or self.available_b > 0
+
+    def is_available(self, driver):
+        return self._available[driver]
+
+    def _set_a(self, driver, value):
+        node = self._size + driver
+        self._tree[node] = value
+        node //= 2
+        while node:
+            self._tree[node] = min(self._tree[2 * node], self._tree[2 * node + 1])
+            node //= 2
+
+    # Первый по порядку свободный к моменту current_time водитель типа A,
+    # у которого отработано не больше max_total минут
+    def find_type_a(self, current_time, max_total):
+        busy = self._busy_a
+        while busy and busy[0][0] <= current_time:
+            end, driver = heapq.heappop(busy)
+            if self._available[driver] and end == self.last_end[driver]:
+                self._set_a(driver, self.totals[driver])
+        if self._tree[1] > max_total:
+            return None
+        node = 1
+        while node < self._size:
+            node = 2 * node if self._tree[2 * node] <= max_total else 2 * node + 1
+        return node - self._size
+
+    # Первый по порядку водитель типа B, которому к current_time положен перерыв
+    def find_break_due(self, current_time):
+        pending = self._pending_breaks
+        while pending and pending[0][0] <= current_time:
+            due, driver = heapq.heappop(pending)
+            if self._available[driver] and due == self.last_rest[driver] + TYPE_B_BREAK_INTERVAL:
+                heapq.heappush(self._due_breaks, driver)
+        due_breaks = self._due_breaks
+        while due_breaks and not self._available[due_breaks[0]]:
+            heapq.heappop(due_breaks)
+        return due_breaks[0] if due_breaks else None
+
+    # Последний по порядку доступный водитель типа B
+    def last_type_b(self):
+        last_b = self._last_b
+        while last_b and not self._available[-last_b[0]]:
+            heapq.heappop(last_b)
+        return -last_b[0] if last_b else None
+
+    def add_route(self, driver, start, end):
+        self.totals[driver] += end - start
+        self.last_end[driver] = end
+        if driver < self.type_a_drivers:
+            if self._available[driver]:
+                self._set_a(driver, self._INFINITY)
+                heapq.heappush(self._busy_a, (end, driver))
+        elif not self._break_tracked[driver] and self.totals[driver] >= TYPE_B_BREAK_INTERVAL:
+            self._break_tracked[driver] = True
+            heapq.heappush(self._pending_breaks, (self.last_rest[driver] + TYPE_B_BREAK_INTERVAL, driver))
+
+    def add_break(self, driver, start, end):
+        self.totals[driver] += end - start
+        self.last_end[driver] = end
+        self.last_rest[driver] = end
+        if self._due_breaks and self._due_breaks[0] == driver:
+            heapq.heappop(self._due_breaks)
+        heapq.heappush(self._pending_breaks, (end + TYPE_B_BREAK_INTERVAL, driver))
+
+    def remove(self, driver):
+        if not self._available[driver]:
+            return
+        self._available[driver] = False
+        if driver < self.type_a_drivers:
+            self.available_a -= 1
+            self._set_a(driver, self._INFINITY)
+        else:
+            self.available_b -= 1
+
+# Проверка на час пик
+def is_peak_time(time):
+    return (time >= MORNING_PEAK_START and time < MORNING_PEAK_END) or (time >= EVENING_PEAK_START and time < EVENING_PEAK_END)
+
+# Проверка выходного дня
+def is_off_day(date):
+    return date.strftime('%A') in OFF_DAYS
+
+# Прямой алгоритм создания расписания.
+# Водитель выбирается через DriverAvailabilityIndex; назначения те же, что у
+# прежнего перебора списков: первый свободный водитель типа A с запасом часов,
+# иначе первый водитель типа B, которому положен перерыв (после перерыва он же
+# берёт рейс), иначе последний доступный водитель типа B. Вне часа пик после
+# назначения водителя типа A, не исчерпавшего лимит, рейс также получает
+# водитель типа B.
+def create_linear_schedule(bus_count, type_a_drivers, type_b_drivers, current_date):
+    profiler = _profiler
+    if profiler is not None:
+        started = profiler.clock()
+    schedule = ScheduleBoard()
+    operators = []
+    shift_start = datetime.datetime.combine(current_date, START_OF_SHIFT)
+    current_time = shift_start
+
+    for i in range(type_a_drivers):
+        operators.append(BusOperator('A', f'A{i+1}'))
+
+    for i in range(type_b_drivers):
+        operators.append(BusOperator('B', f'B{i+1}'))
+
+    index = DriverAvailabilityIndex(type_a_drivers, type_b_drivers)
+    off_day = is_off_day(current_date)
+    find_type_a, find_break_due, last_type_b = index.find_type_a, index.find_break_due, index.last_type_b
+
+    def assign_route(driver, route_duration):
+        operator = operators[driver]
+        itinerary = Itinerary(current_time, route_duration, operator.id)
+        schedule.add_itinerary(itinerary)
+        operator.schedule.append((itinerary.start, itinerary.end, 'route'))
+        operator.total_time += datetime.timedelta(minutes=route_duration)
+        minute = (current_time - shift_start) // ONE_MINUTE
+        index.add_route(driver, minute, minute + route_duration)
+
+    if profiler is not None:
+        # Выбор водителя и назначение рейса замеряются обёртками, цикл не меняется
+        find_type_a = profiler.accumulate('select_driver', find_type_a)
+        find_break_due = profiler.accumulate('select_driver', find_break_due)
+        last_type_b = profiler.accumulate('select_driver', last_type_b)
+        assign_route = profiler.accumulate('assign_route', assign_route)
+        profiler.span('setup', 'linear', started)
+
+    while current_time < datetime.datetime.combine(current_date, datetime.time(23, 59)):
+        route_duration = random.randint(MIN_ROUTE_TIME, MAX_ROUTE_TIME)
+        peak = is_peak_time(current_time.time()) and not off_day
+        if peak:
+            slots = int(bus_count*PEAK_PERCENTAGE)
+        else:
+            passenger_percent = 1 - PEAK_PERCENTAGE if not off_day else 1
+            slots = int(bus_count * passenger_percent)
+        for _ in range(slots):
+            if not index.has_available():
+                break # Если нет доступных водителей, выходим из цикла
+            # Пытаемся найти свободного водителя типа А
+            minute = (current_time - shift_start) // ONE_MINUTE
+            driver = find_type_a(minute, TYPE_A_MINUTES - route_duration)
+            if driver is not None:
+                assign_route(driver, route_duration)
+                exhausted = index.totals[driver] >= TYPE_A_MINUTES
+                if exhausted:
+                    index.remove(driver)
+                if peak or exhausted:
+                    continue
+
+            # Если не нашли свободного водителя типа А, то пробуем найти водителя типа B
+            due = find_break_due(minute)
+            if due is not None:
+                operator = operators[due]
+                break_start_time = current_time
+                break_end_time = current_time + datetime.timedelta(minutes=TYPE_B_LONG_BREAK)
+                operator.schedule.append((break_start_time, break_end_time, 'break'))
+                operator.total_time += datetime.timedelta(minutes=TYPE_B_LONG_BREAK)
+                operator.last_rest = break_end_time
+                index.add_break(due, minute, minute + TYPE_B_LONG_BREAK)
+                current_time = break_end_time
+                driver = due
+            elif index.available_b:
+                driver = last_type_b()
+            if driver is not None:
+                assign_route(driver, route_duration)
+                if driver >= type_a_drivers and index.totals[driver] >= TYPE_B_MINUTES:
+                    index.remove(driver)
+        current_time += datetime.timedelta(minutes=route_duration + random.randint(MIN_CHANGE_TIME, MAX_CHANGE_TIME))
+
+    schedule.operators.extend(operators)
+    if profiler is not None:
+        profiler.span('create_linear_schedule', 'linear', started,
+                      phases=profiler.take('select_driver', 'assign_route'),
+                      args={'bus_count': bus_count, 'itineraries': len(schedule.itineraries)})
+    return schedule
+
+# Генерация случайного расписания для генетического алгоритма
+def generate_initial_schedule(bus_count, type_a_drivers, type_b_drivers, current_date):
+    schedule = ScheduleBoard()
+    drivers = []
+    for i in range(type_a_drivers):
+        drivers.append(BusOperator('A', f'A{i+1}'))
+    for i in range(type_b_drivers):
+        drivers.append(BusOperator('B', f'B{i+1}'))
+    
+    current_time = datetime.datetime.combine(current_date, START_OF_SHIFT)
+    
+    while current_time < datetime.datetime.combine(current_date, datetime.time(23, 59)):
+        route_duration = random.randint(MIN_ROUTE_TIME, MAX_ROUTE_TIME)
+        if is_peak_time(current_time.time()) and not is_off_day(current_date):
+            for _ in range(int(bus_count * PEAK_PERCENTAGE)):
+                if drivers:
+                    driver = random.choice(drivers)
+                    last_itinerary_end = datetime.datetime.combine(current_date,START_OF_SHIFT) 
+                    if driver.schedule:
+                        for start, end, _ in reversed(driver.schedule):
+                            last_itinerary_end = end
+                            break
+                    if  driver.type == 'A' and current_time >= last_itinerary_end and driver.total_time + datetime.timedelta(minutes=route_duration) <= datetime.timedelta(hours=TYPE_A_HOURS) :
+                        itinerary = Itinerary(current_time, route_duration, driver.id)
+                        schedule.add_itinerary(itinerary)
+                        driver.schedule.append((itinerary.start, itinerary.end, 'route'))
+                        driver.total_time += datetime.timedelta(minutes=route_duration)
+                    elif driver.type == 'B':
+                        
+                        if driver.total_time >= datetime.timedelta(minutes=TYPE_B_BREAK_INTERVAL) and driver.last_rest <= current_time - datetime.timedelta(minutes=TYPE_B_BREAK_INTERVAL):
+                            break_start_time = current_time
+                            break_end_time = current_time + datetime.timedelta(minutes=TYPE_B_LONG_BREAK)
+                            driver.schedule.append((break_start_time, break_end_time, 'break'))
+                            driver.total_time += datetime.timedelta(minutes=TYPE_B_LONG_BREAK)
+                            driver.last_rest = break_end_time
+                            current_time += datetime.timedelta(minutes=TYPE_B_LONG_BREAK)
+                            continue
+                        else:
+                            last_itinerary_end = datetime.datetime.combine(current_date,START_OF_SHIFT)
+                            if driver.schedule:
+                                for start, end, _ in reversed(driver.schedule):
+                                    last_itinerary_end = end
+                                    break
+                            if current_time >= last_itinerary_end:
+                                itinerary = Itinerary(current_time, route_duration, driver.id)
+                                schedule.add_itinerary(itinerary)
+                                driver.schedule.append((itinerary.start, itinerary.end, 'route'))
+                                driver.total_time += datetime.timedelta(minutes=route_duration)
+                    else:
+                        drivers.remove(driver)
+                        continue
+                else:
+                    break
+        else:
+            passenger_percent = 1 - PEAK_PERCENTAGE if not is_off_day(current_date) else 1
+            for _ in range(int(bus_count * passenger_percent)):
+                if drivers:
+                    driver = random.choice(drivers)
+                    last_itinerary_end = datetime.datetime.combine(current_date,START_OF_SHIFT)
+                    if driver.schedule:
+                        for start, end, _ in reversed(driver.schedule):
+                            last_itinerary_end = end
+                            break
+                    if driver.type == 'A' and current_time >= last_itinerary_end and driver.total_time + datetime.timedelta(minutes=route_duration) <= datetime.timedelta(hours=TYPE_A_HOURS) :
+                        itinerary = Itinerary(current_time, route_duration, driver.id)
+                        schedule.add_itinerary(itinerary)
+                        driver.schedule.append((itinerary.start, itinerary.end, 'route'))
+                        driver.total_time += datetime.timedelta(minutes=route_duration)
+                    elif driver.type == 'B':
+                        if driver.total_time >= datetime.timedelta(minutes=TYPE_B_BREAK_INTERVAL) and driver.last_rest <= current_time - datetime.timedelta(minutes=TYPE_B_BREAK_INTERVAL):
+                            break_start_time = current_time
+                            break_end_time = current_time + datetime.timedelta(minutes=TYPE_B_LONG_BREAK)
+                            driver.schedule.append((break_start_time, break_end_time, 'break'))
+                            driver.total_time += datetime.timedelta(minutes=TYPE_B_LONG_BREAK)
+                            driver.last_rest = break_end_time
+                            current_time += datetime.timedelta(minutes=TYPE_B_LONG_BREAK)
+                            continue
+                        else:
+                            last_itinerary_end = datetime.datetime.combine(current_date,START_OF_SHIFT)
+                            if driver.schedule:
+                                for start, end, _ in reversed(driver.schedule):
+                                    last_itinerary_end = end
+                                    break
+                            if current_time >= last_itinerary_end:
+                                itinerary = Itinerary(current_time, route_duration, driver.id)
+                                schedule.add_itinerary(itinerary)
+                                driver.schedule.append((itinerary.start, itinerary.end, 'route'))
+                                driver.total_time += datetime.timedelta(minutes=route_duration)
+                    else:
+                        drivers.remove(driver)
+                        continue
+                else:
+                     break
+        current_time += datetime.timedelta(minutes=route_duration + random.randint(MIN_CHANGE_TIME, MAX_CHANGE_TIME))
+
+    schedule.operators.extend(drivers)
+    return schedule
+
+# Функция оценки качества расписания для генетического алгоритма
+def assess_schedule(schedule):
+    if schedule._fitness is None:
+        total_itineraries, peak_itineraries, unique_drivers = schedule.calculate_statistics()
+        schedule._fitness = total_itineraries - unique_drivers*0.1
+    else:
+        ScheduleBoard.cache_stats['hits'] += 1
+    return schedule._fitness
+
+# Функция скрещивания расписаний для генетического алгоритма.
+# Потомок получает новые списки, но общие с родителями объекты Itinerary и
+# BusOperator: они не меняются на месте, мутация заменяет их копиями.
+def combine_schedules(schedule1, schedule2):
+    split_point = random.randint(0, min(len(schedule1.itineraries), len(schedule2.itineraries)))
+    child_schedule = ScheduleBoard()
+    child_schedule.itineraries = schedule1.itineraries[:split_point] + schedule2.itineraries[split_point:]
+
+    split_point = random.randint(0, min(len(schedule1.operators), len(schedule2.operators)))
+    child_schedule.operators = schedule1.operators[:split_point] + schedule2.operators[split_point:]
+    return child_schedule
+
+# Функция мутации расписания для генетического алгоритма. Меняет списки
+# переданного расписания, а изменённые рейс и водителя заменяет новыми объектами.
+def alter_schedule(schedule):
+    if random.random() < MUTATION_RATE_GA:
+        if schedule.itineraries:
+            index_route_mutate = random.randint(0, len(schedule.itineraries)-1)
+            new_start_time = schedule.itineraries[index_route_mutate].start + datetime.timedelta(minutes=random.randint(-30,30))
+        if new_start_time > datetime.datetime.combine(datetime.date.min, START_OF_SHIFT) and new_start_time < datetime.datetime.combine(datetime.date.min, END_OF_SHIFT) + datetime.timedelta(days=1):
+            schedule.itineraries[index_route_mutate] = Itinerary(new_start_time, random.randint(MIN_ROUTE_TIME, MAX_ROUTE_TIME), schedule.itineraries[index_route_mutate].driver)
+            schedule.invalidate()
+    if schedule.operators:
+        index_driver_mutate = random.randint(0, len(schedule.operators) - 1)
+        new_type = random.choice(['A', 'B'])
+        if schedule.operators[index_driver_mutate].type != new_type:
+            schedule.operators[index_driver_mutate] = schedule.operators[index_driver_mutate].with_type(new_type)
+            schedule.invalidate()
+    return schedule
+
+# Правила досрочной остановки генетического алгоритма.
+# patience - остановиться, если лучшая оценка не росла patience поколений;
+# min_spread - остановиться, когда разница лучшей и худшей оценки в популяции
+# не больше min_spread (популяция сошлась); time_budget - жёсткий лимит времени
+# в секундах от начала оптимизации, включая начальную популяцию. Правило со
+# значением None не действует. Условия проверяются после каждого поколения,
+# поэтому лимит времени может быть превышен не больше чем на одно поколение.
+#
+# После запуска reason - причина остановки, generations - число выполненных
+# поколений, elapsed - время в секундах. Один объект описывает один запуск.
+STOP_GENERATIONS = 'generations'  # выполнены все поколения
+STOP_STAGNATION = 'stagnation'    # patience поколений без улучшения
+STOP_CONVERGED = 'converged'      # разброс оценок не больше min_spread
+STOP_DEADLINE = 'deadline'        # исчерпан time_budget
+STOP_CANCELLED = 'cancelled'      # остановлено обработчиком on_generation
+STOP_CACHED = 'cached'            # результат взят из кэша, поколения не выполнялись
+
+
+class EarlyStopping:
+    def __init__(self, patience=None, min_spread=None, time_budget=None):
+        if patience is not None and patience < 1:
+            raise ValueError("patience должно быть не меньше 1")
+        if min_spread is not None and min_spread < 0:
+            raise ValueError("min_spread не может быть отрицательным")
+        if time_budget is not None and time_budget < 0:
+            raise ValueError("time_budget не может быть отрицательным")
+        self.patience = patience
+        self.min_spread = min_spread
+        self.time_budget = time_budget
+        self.reason = None
+        self.generations = 0
+        self.elapsed = 0.0
+        self._started = None
+        self._best_fitness = None
+        self._best_generation = 0
+
+    def start(self):
+        self._started = time.perf_counter()
+        self.reason = None
+        self.generations = 0
+        self._best_fitness = None
+        self._best_generation = 0
+
+    # Вызывается после каждого поколения; True - пора остановиться
+    def update(self, generation, best_fitness, worst_fitness):
+        self.generations = generation
+        self.elapsed = time.perf_counter() - self._started
+        if self._best_fitness is None or best_fitness > self._best_fitness:
+            self._best_fitness = best_fitness
+            self._best_generation = generation
+        if self.time_budget is not None and self.elapsed >= self.time_budget:
+            self.reason = STOP_DEADLINE
+        elif self.patience is not None and generation - self._best_generation >= self.patience:
+            self.reason = STOP_STAGNATION
+        elif self.min_spread is not None and best_fitness - worst_fitness <= self.min_spread:
+            self.reason = STOP_CONVERGED
+        return self.reason is not None
+
+    def finish(self, reason=STOP_GENERATIONS):
+        if self.reason is None:
+            self.reason = reason
+        self.elapsed = time.perf_counter() - self._started
+
+
+# Генетический алгоритм
+# backend выбирает представление популяции: 'objects' - объекты ScheduleBoard,
+# 'compact' - массивы минут (bus_schedule_compact), 'numpy' - вся популяция в
+# матрицах NumPy (bus_schedule_vectorized). Результат всегда ScheduleBoard.
+#
+# on_generation(generation, best_fitness, best) вызывается после каждого
+# поколения; best() возвращает текущее лучшее расписание как ScheduleBoard
+# (для 'objects' - сам объект популяции, его нельзя изменять). Если обработчик
+# вернёт True, оптимизация останавливается и возвращает лучшее найденное
+# расписание.
+#
+# stopping - EarlyStopping; после возврата в нём записаны причина остановки
+# и число выполненных поколений.
+#
+# constraints - учёт допустимости расписания (bus_schedule_validate): None -
+# не проверять, 'penalty' - штраф к оценке за каждое нарушение, 'repair' -
+# снимать рейсы с нарушениями в начальной популяции и после каждой мутации.
+# Бэкенд 'numpy' проверку не поддерживает.
+#
+# warm_start - готовые расписания (CompactBoard на ростере make_roster для этих
+# чисел водителей), которые занимают первые места начальной популяции вместо
+# случайных, например лучшее расписание из кэша для близких параметров.
+#
+# workers - для бэкенда 'objects' начальная популяция строится из зёрен особей
+# (bus_schedule_parallel.parallel_initial_population): в пуле из workers
+# процессов или, при workers <= 1, последовательно. Зёрна берутся из текущего
+# генератора, так что при заданном random.seed результат одинаков для любого
+# workers (но отличается от генерации без workers: у каждой особи своё зерно).
+GA_BACKENDS = ('objects', 'compact', 'numpy')
+GA_CONSTRAINTS = (None, 'penalty', 'repair')
+
+
+def genetic_optimizer(bus_count, type_a_drivers, type_b_drivers, current_date, backend='objects',
+                      population_size=POPULATION_SIZE_GA, generations=GENERATIONS_GA, on_generation=None,
+                      stopping=None, constraints=None, warm_start=None, workers=None):
+    if backend not in GA_BACKENDS:
+        raise ValueError(f"Неизвестный backend генетического алгоритма: {backend}")
+    if constraints not in GA_CONSTRAINTS:
+        raise ValueError(f"Неизвестный режим проверки расписания: {constraints}")
+    if constraints is not None and backend == 'numpy':
+        raise ValueError("Бэкенд numpy не поддерживает проверку расписания")
+    assess, alter, prepare = constraint_hooks(constraints, alter_schedule)
+    if stopping is not None:
+        stopping.start()
+    profiler = _profiler
+    if profiler is not None:
+        started = profiler.clock()
+
+    # Общая проверка после поколения: правила остановки и обработчик пользователя
+    monitor = None
+    if on_generation is not None or stopping is not None:
+        def monitor(generation, best_fitness, worst_fitness, best):
+            stop = stopping is not None and stopping.update(generation, best_fitness, worst_fitness)
+            if on_generation is not None and on_generation(generation, best_fitness, best):
+                if stopping is not None:
+                    stopping.finish(STOP_CANCELLED)
+                stop = True
+            return stop
+
+    if backend == 'compact':
+        from bus_schedule_compact import compact_genetic_optimizer
+        callback = None
+        if monitor is not None:
+            def callback(generation, population):
+                return monitor(generation, assess(population[0]), assess(population[-1]),
+                               population[0].to_schedule_board)
+        result = compact_genetic_optimizer(bus_count, type_a_drivers, type_b_drivers, current_date,
+                                           population_size, generations, callback, constraints,
+                                           warm_start).to_schedule_board()
+    elif backend == 'numpy':
+        from bus_schedule_vectorized import (vectorized_genetic_optimizer, assess_population,
+                                             best_individual, decode_individual)
+        callback = None
+        if monitor is not None:
+            def callback(generation, population, boards):
+                best_fitness, row = best_individual(population)
+                return monitor(generation, best_fitness, float(assess_population(population).min()),
+                               lambda: decode_individual(population, row, boards).to_schedule_board())
+        result = vectorized_genetic_optimizer(bus_count, type_a_drivers, type_b_drivers, current_date,
+                                              population_size, generations, on_generation=callback,
+                                              warm_start=warm_start).to_schedule_board()
+    else:
+        callback = None
+        if monitor is not None:
+            def callback(generation, population):
+                return monitor(generation, assess(population[0]), assess(population[-1]),
+                               lambda: population[0])
+        if profiler is not None:
+            initial_started = profiler.clock()
+        population = [board.to_schedule_board() for board in (warm_start or ())][:population_size]
+        if workers is not None:
+            from bus_schedule_parallel import parallel_initial_population
+            population += parallel_initial_population(bus_count, type_a_drivers, type_b_drivers, current_date,
+                                                      population_size - len(population), workers)
+        else:
+            population += [generate_initial_schedule(bus_count, type_a_drivers, type_b_drivers, current_date)
+                           for _ in range(population_size - len(population))]
+        if prepare is not None:
+            population = [prepare(schedule) for schedule in population]
+        if profiler is not None:
+            profiler.span('initial_population', 'genetic', initial_started, args={'size': population_size})
+        population = evolve_population(population, generations, population_size, alter=alter,
+                                       on_generation=callback, assess=assess)
+        result = population[0]
+    if stopping is not None:
+        stopping.finish()
+    if profiler is not None:
+        profiler.span('genetic_optimizer', 'genetic', started,
+                      args={'backend': backend, 'population_size': population_size, 'generations': generations})
+    return result
+
+# Оценка, мутация и подготовка начальной популяции для режима constraints
+# генетического алгоритма (см. genetic_optimizer). prepare равен None, если
+# начальную популяцию менять не нужно.
+def constraint_hooks(constraints, alter):
+    if constraints is None:
+        return assess_schedule, alter, None
+    from bus_schedule_validate import assess_penalized, drop_violations
+    if constraints == 'penalty':
+        return assess_penalized, alter, None
+
+    def alter_and_repair(schedule):
+        return drop_violations(alter(schedule))
+    return assess_schedule, alter_and_repair, drop_violations
+
+# Эволюция популяции на заданное число поколений (используется и островной моделью).
+# combine и alter позволяют эволюционировать расписания в другом представлении.
+# on_generation(generation, population) получает популяцию, отсортированную
+# от лучшего расписания; если он вернёт True, эволюция останавливается.
+# При включённом профилировщике (bus_schedule_profile) записывается время фаз
+# каждого поколения, оценки и разнообразие популяции. assess - функция оценки
+# для отбора (по умолчанию assess_schedule).
+def evolve_population(population, generations, population_size, combine=combine_schedules, alter=alter_schedule,
+                      on_generation=None, assess=assess_schedule):
+    profiler = _profiler
+    if profiler is not None:
+        combine = profiler.accumulate('combine', combine)
+        alter = profiler.accumulate('alter', alter)
+    for generation in range(generations):
+        if profiler is not None:
+            started = profiler.clock()
+        population.sort(key=assess, reverse=True)
+        parents = population[:population_size // 2]
+        if profiler is not None:
+            sorted_at = profiler.clock()
+
+        offspring = []
+        for i in range(0, len(parents), 2):
+            if i+1 < len(parents):
+                child1 = combine(parents[i], parents[i+1])
+                child2 = combine(parents[i+1], parents[i])
+                offspring.append(alter(child1))
+                offspring.append(alter(child2))
+            else:
+                # Родитель остаётся в популяции, мутирует его копия
+                offspring.append(alter(parents[i].copy()))
+
+        if profiler is not None:
+            bred_at = profiler.clock()
+        population = parents + offspring
+        population.sort(key=assess, reverse=True)
+        population = population[:population_size]
+        if profiler is not None:
+            phases = {'sort': sorted_at - started, **profiler.take('combine', 'alter'),
+                      'select': profiler.clock() - bred_at}
+            profiler.generation(generation + 1, started, phases, [assess(board) for board in population],
+                                len({board.calculate_statistics() for board in population}) / len(population))
+        if on_generation is not None and on_generation(generation + 1, population):
+            break
+
+    return population
+
+# Запись расписания в CSV-файл
+def export_schedule_to_csv(linear_schedule, optimized_schedule, filename, current_date):
+    with open(filename, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['Algorithm', 'Operator ID', 'Schedule'])
+        
+        for schedule, algorithm_name in [(linear_schedule, "Linear"), (optimized_schedule, "Genetic")]:
+          for operator in schedule.operators:
+            shifts_text = ""
+            for start, end, type in operator.schedule:
+              start_datetime = start
+              end_datetime = end
+              if type == 'route':
+                  shifts_text += f"Работа: {start_datetime.strftime('%Y-%m-%d %H:%M')}-{end_datetime.strftime('%Y-%m-%d %H:%M')}, "
+              elif type == 'break':
+                  shifts_text += f"Перерыв: {start_datetime.strftime('%Y-%m-%d %H:%M')}-{end_datetime.strftime('%Y-%m-%d %H:%M')}, "
+            shifts_text = shifts_text.rstrip(", ")
+            writer.writerow([algorithm_name, operator.id, shifts_text])
+
+# Запись сравнения результатов в CSV-файл; exact_metrics - метрики точного
+# алгоритма (bus_schedule_exact), добавляются третьим столбцом
+def export_comparison_to_csv(linear_metrics, optimized_metrics, filename, exact_metrics=None):
+    columns = [linear_metrics, optimized_metrics] + ([exact_metrics] if exact_metrics is not None else [])
+    with open(filename, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['Metric', 'Linear Algorithm', 'Genetic Algorithm'] +
+                        (['Exact Algorithm'] if exact_metrics is not None else []))
+        writer.writerow(['Total Itineraries'] + [metrics[0] for metrics in columns])
+        writer.writerow(['Peak Itineraries'] + [metrics[1] for metrics in columns])
+        writer.writerow(['Unique Operators'] + [metrics[2] for metrics in columns])
+
+# Представление расписания в виде словаря для JSON-вывода
+def schedule_to_dict(schedule):
+    operators = []
+    for operator in schedule.operators:
+        operators.append({
+            'id': operator.id,
+            'type': operator.type,
+            'schedule': [[kind, start.strftime('%Y-%m-%d %H:%M'), end.strftime('%Y-%m-%d %H:%M')]
+                         for start, end, kind in operator.schedule],
+        })
+    total_itineraries, peak_itineraries, unique_drivers = schedule.calculate_statistics()
+    return {
+        'total_itineraries': total_itineraries,
+        'peak_itineraries': peak_itineraries,
+        'unique_operators': unique_drivers,
+        'operators': operators,
+    }
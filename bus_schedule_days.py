@@ -0,0 +1,131 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Расписание на несколько дней (неделю, месяц) в пуле процессов.
+#
+# Расписание зависит от даты только через тип дня (is_off_day), а
+# CompactBoard хранит время в минутах от начала смены. Поэтому дни с
+# одинаковым типом и параметрами считаются один раз, а остальные получают
+# копию результата со своей датой (CompactBoard.for_date). Уникальные задачи
+# (параметры, тип дня, алгоритм) выполняются параллельно.
+
+import csv
+import datetime
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from bus_schedule_core import is_off_day, genetic_optimizer
+from bus_schedule_compact import (CompactBoard, create_linear_schedule_compact,
+                                  compact_genetic_optimizer, from_schedule_board)
+from bus_schedule_exact import create_exact_schedule_compact
+from bus_schedule_parallel import default_workers
+
+ALGORITHM_NAMES = {'linear': "Linear", 'genetic': "Genetic", 'exact': "Exact"}
+
+
+# Тип дня для объединения одинаковых дней
+def day_type(current_date):
+    return 'off' if is_off_day(current_date) else 'regular'
+
+
+# Все даты диапазона включительно
+def date_range(first_date, last_date):
+    if last_date < first_date:
+        raise ValueError("Конец диапазона раньше начала")
+    return [first_date + datetime.timedelta(days=offset) for offset in range((last_date - first_date).days + 1)]
+
+
+# Одна уникальная задача; выполняется в процессе пула
+def _day_task(algorithm, bus_count, type_a_drivers, type_b_drivers, current_date, backend, seed):
+    random.seed(seed)
+    if algorithm == 'linear':
+        return create_linear_schedule_compact(bus_count, type_a_drivers, type_b_drivers, current_date)
+    if algorithm == 'exact':
+        return create_exact_schedule_compact(bus_count, type_a_drivers, type_b_drivers, current_date)
+    if backend == 'compact':
+        return compact_genetic_optimizer(bus_count, type_a_drivers, type_b_drivers, current_date)
+    schedule = genetic_optimizer(bus_count, type_a_drivers, type_b_drivers, current_date, backend=backend)
+    return from_schedule_board(schedule, current_date)
+
+
+# Расписание для списка заданий (bus_count, type_a, type_b, date).
+# Возвращает словарь {(bus_count, type_a, type_b, date): {"Linear": CompactBoard, ...}}
+# в порядке заданий и число фактически выполненных расчётов.
+def schedule_days(jobs, algorithms=('linear', 'genetic'), backend='compact', workers=None, seed=None):
+    if seed is None:
+        seed = random.randrange(2**32)
+    tasks = {}
+    for bus_count, type_a_drivers, type_b_drivers, current_date in jobs:
+        for algorithm in algorithms:
+            key = (algorithm, bus_count, type_a_drivers, type_b_drivers, day_type(current_date))
+            # Первая дата с таким ключом считается представителем группы
+            tasks.setdefault(key, current_date)
+
+    arguments = []
+    for (algorithm, bus_count, type_a_drivers, type_b_drivers, kind), representative_date in tasks.items():
+        arguments.append((algorithm, bus_count, type_a_drivers, type_b_drivers, representative_date, backend,
+                          f"{seed}:{bus_count}:{type_a_drivers}:{type_b_drivers}:{kind}:{algorithm}"))
+    workers = workers or default_workers(len(arguments))
+    if workers > 1 and len(arguments) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            boards = list(executor.map(_day_task, *zip(*arguments)))
+    else:
+        boards = [_day_task(*task) for task in arguments]
+    computed = dict(zip(tasks, boards))
+
+    results = {}
+    for bus_count, type_a_drivers, type_b_drivers, current_date in jobs:
+        day = results.setdefault((bus_count, type_a_drivers, type_b_drivers, current_date), {})
+        for algorithm in algorithms:
+            board = computed[(algorithm, bus_count, type_a_drivers, type_b_drivers, day_type(current_date))]
+            day[ALGORITHM_NAMES[algorithm]] = board if board.current_date == current_date else board.for_date(current_date)
+    return results, len(arguments)
+
+
+# Расписание на диапазон дат с одинаковыми параметрами
+def schedule_date_range(first_date, last_date, bus_count, type_a_drivers, type_b_drivers,
+                        algorithms=('linear', 'genetic'), backend='compact', workers=None, seed=None):
+    jobs = [(bus_count, type_a_drivers, type_b_drivers, current_date)
+            for current_date in date_range(first_date, last_date)]
+    return schedule_days(jobs, algorithms, backend, workers, seed)
+
+
+# Объединённое расписание по дням в CSV (формат export_schedule_to_csv с датой)
+def export_days_to_csv(results, filename):
+    with open(filename, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['Date', 'Day Type', 'Algorithm', 'Operator ID', 'Schedule'])
+        for (bus_count, type_a_drivers, type_b_drivers, current_date), boards in results.items():
+            for algorithm_name, board in boards.items():
+                schedule = board.to_schedule_board() if isinstance(board, CompactBoard) else board
+                for operator in schedule.operators:
+                    shifts = []
+                    for start, end, type in operator.schedule:
+                        label = "Работа" if type == 'route' else "Перерыв"
+                        shifts.append(f"{label}: {start.strftime('%Y-%m-%d %H:%M')}-{end.strftime('%Y-%m-%d %H:%M')}")
+                    writer.writerow([current_date.isoformat(), day_type(current_date), algorithm_name,
+                                     operator.id, ", ".join(shifts)])
+
+
+# Сравнительный отчёт по дням: метрики каждого алгоритма и итог за период
+def export_days_comparison_to_csv(results, filename):
+    algorithm_names = []
+    for boards in results.values():
+        for algorithm_name in boards:
+            if algorithm_name not in algorithm_names:
+                algorithm_names.append(algorithm_name)
+    metrics = ['Total Itineraries', 'Peak Itineraries', 'Unique Operators']
+    totals = {name: [0, 0, 0] for name in algorithm_names}
+    with open(filename, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(['Date', 'Day Type', 'Bus Count', 'Type A', 'Type B'] +
+                        [f"{name} {metric}" for name in algorithm_names for metric in metrics])
+        for (bus_count, type_a_drivers, type_b_drivers, current_date), boards in results.items():
+            row = [current_date.isoformat(), day_type(current_date), bus_count, type_a_drivers, type_b_drivers]
+            for name in algorithm_names:
+                statistics = boards[name].calculate_statistics() if name in boards else ('', '', '')
+                row.extend(statistics)
+                if name in boards:
+                    totals[name] = [total + value for total, value in zip(totals[name], statistics)]
+            writer.writerow(row)
+        writer.writerow(['Total', '', '', '', ''] + [value for name in algorithm_names for value in totals[name]])
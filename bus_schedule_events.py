@@ -0,0 +1,266 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Дискретно-событийная модель дня: генераторы расписания без цикла с
+# фиксированным шагом.
+#
+# EventQueue - очередь событий с приоритетом по времени (минуты от начала
+# смены) и виду события; события одной минуты обрабатываются в порядке
+# SHIFT_END, BUS_RETURNS, BREAK_DUE, DRIVER_FREE, BUS_DEPARTS, поэтому
+# освободившийся в эту минуту водитель успевает на отправление.
+#
+# Каждый из bus_count автобусов живёт своим циклом: отправление, рейс
+# (MIN_ROUTE_TIME..MAX_ROUTE_TIME), возвращение, пересменка
+# (MIN_CHANGE_TIME..MAX_CHANGE_TIME), следующее отправление. Автобус с
+# номером i выходит на линию, только если i меньше нормы часа (как в прямом
+# алгоритме: PEAK_PERCENTAGE в час пик, остальные в другое время, все в
+# выходной); иначе он ждёт ближайшей смены нормы. Водитель на отправление
+# берётся из пула свободных; если пул пуст, автобус ждёт в очереди и уходит,
+# как только водитель освободится. После рейса водитель типа B, отработавший
+# TYPE_B_BREAK_INTERVAL минут с последнего отдыха, уходит на TYPE_B_LONG_BREAK;
+# перерыв сдвигает только его время. Водитель, которому не хватит часов на
+# самый длинный рейс (с перерывом для типа B), в пул больше не возвращается.
+# Поэтому записи водителей не пересекаются и укладываются в лимиты.
+#
+# Пул задаёт политику выбора водителя:
+#   - 'linear' - свободный водитель типа A с наименьшим номером, иначе типа B
+#     (как прямой алгоритм);
+#   - 'random' - случайный свободный водитель (как начальная популяция
+#     генетического алгоритма).
+# Отправления прекращаются в last_departure (по умолчанию 23:59, как в
+# генераторах с циклом; не позже END_OF_SHIFT следующих суток). Каждое
+# событие стоит O(log n), всего O(e log n) на e событий - около трёх на рейс,
+# независимо от числа водителей.
+
+import bisect
+import functools
+import heapq
+import random
+from collections import deque
+
+from bus_schedule_core import (END_OF_SHIFT, MIN_ROUTE_TIME, MAX_ROUTE_TIME, MIN_CHANGE_TIME, MAX_CHANGE_TIME,
+                               TYPE_A_MINUTES, TYPE_B_MINUTES, TYPE_B_BREAK_INTERVAL, TYPE_B_LONG_BREAK,
+                               PEAK_PERCENTAGE, POPULATION_SIZE_GA, is_off_day, genetic_optimizer)
+from bus_schedule_compact import (CompactBoard, BREAK, DAY_END_MINUTE, SHIFT_START_MINUTE, MINUTES_PER_DAY,
+                                  make_roster, is_peak_minute, _DriverState, _add_route, _minutes_of_day)
+
+# Виды событий в порядке обработки внутри одной минуты
+SHIFT_END = 0
+BUS_RETURNS = 1
+BREAK_DUE = 2
+DRIVER_FREE = 3
+BUS_DEPARTS = 4
+EVENT_NAMES = ('shift_end', 'bus_returns', 'break_due', 'driver_free', 'bus_departs')
+
+# Конец смены следующих суток в минутах от начала смены
+SHIFT_END_MINUTE = (_minutes_of_day(END_OF_SHIFT) - SHIFT_START_MINUTE) % MINUTES_PER_DAY
+
+POLICIES = ('linear', 'random')
+
+
+class EventQueue:
+    def __init__(self):
+        self.now = 0
+        self.processed = 0
+        self._queue = []
+        self._sequence = 0  # порядок добавления для событий одной минуты и вида
+
+    def __len__(self):
+        return len(self._queue)
+
+    def schedule(self, time, kind, payload=None):
+        heapq.heappush(self._queue, (time, kind, self._sequence, payload))
+        self._sequence += 1
+
+    # Обработка событий по порядку: handlers[kind](time, payload). Обработчик,
+    # вернувший True, останавливает очередь.
+    def run(self, handlers):
+        queue = self._queue
+        while queue:
+            time, kind, _, payload = heapq.heappop(queue)
+            self.now = time
+            self.processed += 1
+            if handlers[kind](time, payload):
+                break
+
+
+# Свободные водители: сначала тип A, затем B, внутри типа - по номеру
+class _OrderedPool:
+    def __init__(self, type_a_drivers):
+        self.type_a_drivers = type_a_drivers
+        self._type_a = []
+        self._type_b = []
+
+    def __len__(self):
+        return len(self._type_a) + len(self._type_b)
+
+    def add(self, driver):
+        heapq.heappush(self._type_a if driver < self.type_a_drivers else self._type_b, driver)
+
+    def take(self):
+        if self._type_a:
+            return heapq.heappop(self._type_a)
+        if self._type_b:
+            return heapq.heappop(self._type_b)
+        return None
+
+
+# Свободные водители в случайном порядке: выбор и удаление за O(1)
+class _RandomPool:
+    def __init__(self):
+        self._drivers = []
+
+    def __len__(self):
+        return len(self._drivers)
+
+    def add(self, driver):
+        self._drivers.append(driver)
+
+    def take(self):
+        drivers = self._drivers
+        if not drivers:
+            return None
+        position = random.randrange(len(drivers))
+        drivers[position], drivers[-1] = drivers[-1], drivers[position]
+        return drivers.pop()
+
+
+# Минуты смены нормы автобусов (границы часа пик) до last_departure: ((минута, норма), ...)
+@functools.lru_cache(maxsize=64)
+def _slot_changes(bus_count, off_day, last_departure, peak_percentage):
+    changes = []
+    previous = None
+    for minute in range(last_departure):
+        if off_day:
+            slots = bus_count
+        else:
+            slots = int(bus_count * (peak_percentage if is_peak_minute(minute) else 1 - peak_percentage))
+        if slots != previous:
+            changes.append((minute, slots))
+            previous = slots
+    return tuple(changes)
+
+
+# Расписание дня по событиям в компактном представлении. route_time - пределы
+# длительности рейса, peak_percentage - доля автобусов на линии в час пик
+# (по умолчанию - константы одной линии из bus_schedule_core).
+def simulate_schedule_compact(bus_count, type_a_drivers, type_b_drivers, current_date, policy='linear',
+                              last_departure=DAY_END_MINUTE, route_time=(MIN_ROUTE_TIME, MAX_ROUTE_TIME),
+                              peak_percentage=PEAK_PERCENTAGE):
+    min_route_time, max_route_time = route_time
+    if not 0 < min_route_time <= max_route_time:
+        raise ValueError(f"Неверные пределы длительности рейса: {route_time}")
+    if policy not in POLICIES:
+        raise ValueError(f"Неизвестная политика выбора водителя: {policy}")
+    if not 0 < last_departure <= SHIFT_END_MINUTE:
+        raise ValueError(f"last_departure должно быть от 1 до {SHIFT_END_MINUTE} минут от начала смены")
+    roster = make_roster(type_a_drivers, type_b_drivers)
+    board = CompactBoard(current_date, roster)
+    state = _DriverState(len(roster))
+    since_rest = [0] * len(roster)  # работа водителя типа B с последнего отдыха
+    order = []  # водители в порядке первого рейса
+    used = bytearray(len(roster))
+    pool = _OrderedPool(type_a_drivers) if policy == 'linear' else _RandomPool()
+    for driver in range(len(roster)):
+        pool.add(driver)
+    waiting = deque()  # автобусы, ждущие водителя
+    changes = _slot_changes(bus_count, is_off_day(current_date), last_departure, peak_percentage)
+    change_minutes = [minute for minute, _ in changes]
+    events = EventQueue()
+    randint = random.randint
+
+    def limit(driver):
+        return TYPE_A_MINUTES if driver < type_a_drivers else TYPE_B_MINUTES
+
+    # Ближайшая минута не раньше time, когда автобус bus на линии; None - больше не выходит
+    def next_service(bus, time):
+        position = bisect.bisect_right(change_minutes, time) - 1
+        if changes[position][1] > bus:
+            return time
+        for minute, slots in changes[position + 1:]:
+            if slots > bus:
+                return minute
+        return None
+
+    def depart(bus, time):
+        driver = pool.take()
+        if driver is None:
+            waiting.append(bus)
+            return
+        duration = randint(min_route_time, max_route_time)
+        _add_route(board, state, driver, time, duration)
+        if not used[driver]:
+            used[driver] = 1
+            order.append(driver)
+        if driver >= type_a_drivers:
+            since_rest[driver] += duration
+        events.schedule(time + duration, BUS_RETURNS, (bus, driver))
+
+    def on_shift_end(time, payload):
+        return True
+
+    def on_bus_departs(time, bus):
+        start = next_service(bus, time)
+        if start is None:
+            return
+        if start > time:
+            events.schedule(start, BUS_DEPARTS, bus)
+        else:
+            depart(bus, time)
+
+    def on_bus_returns(time, payload):
+        bus, driver = payload
+        events.schedule(time + randint(MIN_CHANGE_TIME, MAX_CHANGE_TIME), BUS_DEPARTS, bus)
+        if driver >= type_a_drivers and since_rest[driver] >= TYPE_B_BREAK_INTERVAL:
+            events.schedule(time, BREAK_DUE, driver)
+        else:
+            events.schedule(time, DRIVER_FREE, driver)
+
+    def on_break_due(time, driver):
+        if state.total[driver] + TYPE_B_LONG_BREAK + max_route_time > TYPE_B_MINUTES:
+            return  # После перерыва на рейс уже не хватит часов
+        state.add(driver, time, time + TYPE_B_LONG_BREAK, BREAK)
+        since_rest[driver] = 0
+        events.schedule(time + TYPE_B_LONG_BREAK, DRIVER_FREE, driver)
+
+    def on_driver_free(time, driver):
+        if state.total[driver] + max_route_time > limit(driver):
+            return
+        pool.add(driver)
+        while waiting and pool:
+            bus = waiting.popleft()
+            on_bus_departs(time, bus)
+
+    events.schedule(last_departure, SHIFT_END)
+    for bus in range(bus_count):
+        events.schedule(0, BUS_DEPARTS, bus)
+    events.run((on_shift_end, on_bus_returns, on_break_due, on_driver_free, on_bus_departs))
+
+    state.build(board, order)
+    board.operator_types += bytes(ord('A') if driver < type_a_drivers else ord('B') for driver in order)
+    return board
+
+
+# Аналог прямого алгоритма на событиях
+def simulate_linear_schedule_compact(bus_count, type_a_drivers, type_b_drivers, current_date):
+    return simulate_schedule_compact(bus_count, type_a_drivers, type_b_drivers, current_date, 'linear')
+
+
+# Аналог случайного начального расписания на событиях
+def simulate_initial_schedule_compact(bus_count, type_a_drivers, type_b_drivers, current_date):
+    return simulate_schedule_compact(bus_count, type_a_drivers, type_b_drivers, current_date, 'random')
+
+
+# Аналог прямого алгоритма на событиях; результат - ScheduleBoard
+def simulate_linear_schedule(bus_count, type_a_drivers, type_b_drivers, current_date):
+    return simulate_linear_schedule_compact(bus_count, type_a_drivers, type_b_drivers, current_date).to_schedule_board()
+
+
+# Генетический алгоритм, начальная популяция которого построена на событиях
+# (передаётся как warm_start); остальные аргументы - как у genetic_optimizer
+def simulated_genetic_optimizer(bus_count, type_a_drivers, type_b_drivers, current_date,
+                                population_size=POPULATION_SIZE_GA, **kwargs):
+    population = [simulate_initial_schedule_compact(bus_count, type_a_drivers, type_b_drivers, current_date)
+                  for _ in range(population_size)]
+    return genetic_optimizer(bus_count, type_a_drivers, type_b_drivers, current_date,
+                             population_size=population_size, warm_start=population, **kwargs)
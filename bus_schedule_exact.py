@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Детерминированный алгоритм: распределение рейсов по водителям как разбиение
+# интервалов (interval partitioning) сканирующей прямой.
+#
+# Спрос на рейсы задаётся без случайности: волны отправлений идут от начала
+# смены с шагом EXACT_ROUTE_TIME + EXACT_CHANGE_TIME (средние длительности рейса
+# и пересменки), в каждой волне столько рейсов, сколько автобусов выходит на
+# линию в этот час (как в прямом алгоритме: PEAK_PERCENTAGE в час пик, остальные
+# в другое время, все автобусы в выходной).
+#
+# Рейсы просматриваются по времени начала. Освободившиеся водители лежат в куче
+# по номеру (сначала тип A), занятые - в куче по времени освобождения; новый
+# водитель берётся из списка, только если свободных нет. Без лимитов часов
+# число водителей при этом равно наибольшему числу одновременных рейсов, то
+# есть минимально возможному. Лимиты TYPE_A_HOURS и TYPE_B_HOURS и перерывы
+# водителей типа B соблюдаются жадно: после TYPE_B_BREAK_INTERVAL минут
+# работы с последнего отдыха водитель типа B уходит на TYPE_B_LONG_BREAK, а
+# водитель, которому не хватает часов на рейс, больше не назначается.
+# Все операции с кучами - O(log n), всего O(n log n) на n рейсов.
+
+import heapq
+
+from bus_schedule_core import (MIN_ROUTE_TIME, MAX_ROUTE_TIME, MIN_CHANGE_TIME, MAX_CHANGE_TIME,
+                               TYPE_A_MINUTES, TYPE_B_MINUTES, TYPE_B_BREAK_INTERVAL, TYPE_B_LONG_BREAK,
+                               is_off_day)
+from bus_schedule_compact import (CompactBoard, BREAK, DAY_END_MINUTE, make_roster, _DriverState,
+                                  _add_route, _slot_count)
+
+EXACT_ROUTE_TIME = (MIN_ROUTE_TIME + MAX_ROUTE_TIME) // 2
+EXACT_CHANGE_TIME = (MIN_CHANGE_TIME + MAX_CHANGE_TIME) // 2
+
+
+# Волны отправлений дня: (минута от начала смены, число рейсов)
+def departure_waves(bus_count, current_date):
+    off_day = is_off_day(current_date)
+    current_time = 0
+    while current_time < DAY_END_MINUTE:
+        slots, _ = _slot_count(bus_count, current_time, off_day)
+        yield current_time, slots
+        current_time += EXACT_ROUTE_TIME + EXACT_CHANGE_TIME
+
+
+# Точный алгоритм в компактном представлении
+def create_exact_schedule_compact(bus_count, type_a_drivers, type_b_drivers, current_date):
+    roster = make_roster(type_a_drivers, type_b_drivers)
+    board = CompactBoard(current_date, roster)
+    state = _DriverState(len(roster))
+    # Минуты работы водителя типа B с последнего отдыха
+    since_rest = [0] * len(roster)
+    busy = []   # (время освобождения, водитель)
+    ready = []  # свободные водители по номеру
+    unused = iter(range(len(roster)))
+    order = []  # водители в порядке первого рейса
+
+    def limit(driver):
+        return TYPE_A_MINUTES if driver < type_a_drivers else TYPE_B_MINUTES
+
+    for start, slots in departure_waves(bus_count, current_date):
+        while busy and busy[0][0] <= start:
+            free_at, driver = heapq.heappop(busy)
+            if driver >= type_a_drivers and since_rest[driver] >= TYPE_B_BREAK_INTERVAL:
+                if state.total[driver] + TYPE_B_LONG_BREAK + EXACT_ROUTE_TIME > limit(driver):
+                    continue  # После перерыва на рейс уже не хватит часов
+                state.add(driver, free_at, free_at + TYPE_B_LONG_BREAK, BREAK)
+                since_rest[driver] = 0
+                heapq.heappush(busy, (free_at + TYPE_B_LONG_BREAK, driver))
+                continue
+            heapq.heappush(ready, driver)
+
+        for _ in range(slots):
+            driver = None
+            while ready:
+                candidate = heapq.heappop(ready)
+                if state.total[candidate] + EXACT_ROUTE_TIME <= limit(candidate):
+                    driver = candidate
+                    break
+            if driver is None:
+                driver = next(unused, None)
+                if driver is None:
+                    break  # Все водители заняты или исчерпали лимит: рейсы волны не обслуживаются
+                order.append(driver)
+            _add_route(board, state, driver, start, EXACT_ROUTE_TIME)
+            if driver >= type_a_drivers:
+                since_rest[driver] += EXACT_ROUTE_TIME
+            heapq.heappush(busy, (start + EXACT_ROUTE_TIME, driver))
+
+    state.build(board, order)
+    board.operator_types += bytes(ord('A') if driver < type_a_drivers else ord('B') for driver in order)
+    return board
+
+
+# Точный алгоритм; результат - ScheduleBoard, как у create_linear_schedule
+def create_exact_schedule(bus_count, type_a_drivers, type_b_drivers, current_date):
+    return create_exact_schedule_compact(bus_count, type_a_drivers, type_b_drivers, current_date).to_schedule_board()
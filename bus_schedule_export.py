@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Потоковый экспорт расписания: одна строка на рейс или перерыв водителя.
+#
+# schedule_records() - генератор записей (дата, алгоритм, водитель, вид,
+# начало, конец) с временем в минутах от START_OF_SHIFT даты расписания. Он
+# одинаково читает ScheduleBoard и CompactBoard и ничего не накапливает, поэтому
+# CSV пишется построчно (export_rows_to_csv), а каждая минута форматируется
+# один раз.
+#
+# Для анализа больших расписаний (неделя, месяц) есть двоичный колоночный
+# формат: заголовок JSON со справочниками дат, алгоритмов и водителей, затем
+# столбцы фиксированной ширины (little-endian), каждый с границы 8 байт.
+# load_schedule_columns() отображает файл в память (mmap) и возвращает
+# столбцы без копирования: массивы NumPy, если numpy установлен, иначе memoryview.
+
+import csv
+import datetime
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+from bus_schedule_core import START_OF_SHIFT, ONE_MINUTE
+from bus_schedule_compact import CompactBoard, KIND_NAMES
+
+ROW_HEADER = ['Algorithm', 'Operator ID', 'Kind', 'Start', 'End']
+
+COLUMNS_MAGIC = b'BUSCOLS1'
+# Столбцы двоичного формата: имя и код типа array (он же формат memoryview)
+COLUMNS = (
+    ('date', 'H'),       # номер даты в справочнике dates
+    ('algorithm', 'B'),  # номер алгоритма в справочнике algorithms
+    ('operator', 'I'),   # номер водителя в справочнике operators
+    ('kind', 'B'),       # 0 - рейс, 1 - перерыв (KIND_NAMES)
+    ('start', 'h'),      # минуты от START_OF_SHIFT даты
+    ('end', 'h'),
+)
+NUMPY_DTYPES = {'H': '<u2', 'B': 'u1', 'I': '<u4', 'h': '<i2'}
+COLUMN_ALIGNMENT = 8
+
+
+# Пары расписаний (дата, алгоритм, расписание) для двух алгоритмов одного дня
+def schedule_pair(linear_schedule, optimized_schedule, current_date):
+    return [(current_date, "Linear", linear_schedule), (current_date, "Genetic", optimized_schedule)]
+
+
+# Расписания из результата bus_schedule_days.schedule_days
+def days_boards(results):
+    for (bus_count, type_a_drivers, type_b_drivers, current_date), boards in results.items():
+        for algorithm_name, board in boards.items():
+            yield current_date, algorithm_name, board
+
+
+# Записи всех водителей: (дата, алгоритм, водитель, вид, начало, конец) в минутах
+def schedule_records(boards):
+    for current_date, algorithm_name, board in boards:
+        if isinstance(board, CompactBoard):
+            roster = board.roster
+            for index, roster_index in enumerate(board.operators):
+                operator_id = roster[roster_index]
+                for start, end, kind in board.operator_entries(index):
+                    yield current_date, algorithm_name, operator_id, kind, start, end
+        else:
+            base = datetime.datetime.combine(current_date, START_OF_SHIFT)
+            for operator in board.operators:
+                for start, end, kind in operator.schedule:
+                    yield (current_date, algorithm_name, operator.id, KIND_NAMES.index(kind),
+                           (start - base) // ONE_MINUTE, (end - base) // ONE_MINUTE)
+
+
+# Строки CSV из записей; форматирование минуты кэшируется для каждой даты
+def schedule_rows(boards):
+    texts = {}
+    for current_date, algorithm_name, operator_id, kind, start, end in schedule_records(boards):
+        start_text = texts.get((current_date, start))
+        if start_text is None:
+            start_text = texts[(current_date, start)] = _format_minute(current_date, start)
+        end_text = texts.get((current_date, end))
+        if end_text is None:
+            end_text = texts[(current_date, end)] = _format_minute(current_date, end)
+        yield algorithm_name, operator_id, KIND_NAMES[kind], start_text, end_text
+
+
+def _format_minute(current_date, offset):
+    moment = datetime.datetime.combine(current_date, START_OF_SHIFT) + offset * ONE_MINUTE
+    return moment.strftime('%Y-%m-%d %H:%M')
+
+
+# Потоковая запись CSV: одна строка на рейс или перерыв; возвращает число строк
+def export_rows_to_csv(boards, filename):
+    count = 0
+    with open(filename, 'w', newline='') as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(ROW_HEADER)
+        for row in schedule_rows(boards):
+            writer.writerow(row)
+            count += 1
+    return count
+
+
+# Запись двоичного колоночного файла; возвращает число записей.
+# Столбцы копятся в array (2-4 байта на значение) и пишутся подряд.
+def export_schedule_columns(boards, filename):
+    tables = {'dates': {}, 'algorithms': {}, 'operators': {}}
+    columns = {name: array(code) for name, code in COLUMNS}
+
+    def lookup(table, value):
+        index = table.get(value)
+        if index is None:
+            index = table[value] = len(table)
+        return index
+
+    for current_date, algorithm_name, operator_id, kind, start, end in schedule_records(boards):
+        columns['date'].append(lookup(tables['dates'], current_date.isoformat()))
+        columns['algorithm'].append(lookup(tables['algorithms'], algorithm_name))
+        columns['operator'].append(lookup(tables['operators'], operator_id))
+        columns['kind'].append(kind)
+        columns['start'].append(start)
+        columns['end'].append(end)
+
+    count = len(columns['kind'])
+    layout = []
+    offset = 0
+    for name, code in COLUMNS:
+        layout.append({'name': name, 'type': code, 'offset': offset})
+        offset = _aligned(offset + count * columns[name].itemsize)
+    header = json.dumps({'rows': count, 'columns': layout,
+                         **{name: list(table) for name, table in tables.items()}}).encode()
+    preamble = len(COLUMNS_MAGIC) + 4
+    header += b' ' * (_aligned(preamble + len(header)) - preamble - len(header))
+
+    with open(filename, 'wb') as binfile:
+        binfile.write(COLUMNS_MAGIC)
+        binfile.write(struct.pack('<I', len(header)))
+        binfile.write(header)
+        for (name, code), column in zip(COLUMNS, layout):
+            values = columns[name]
+            if sys.byteorder == 'big':
+                values.byteswap()
+            binfile.write(values.tobytes())
+            binfile.write(b'\0' * (_aligned(values.itemsize * count) - values.itemsize * count))
+    return count
+
+
+def _aligned(offset):
+    return (offset + COLUMN_ALIGNMENT - 1) // COLUMN_ALIGNMENT * COLUMN_ALIGNMENT
+
+
+# Столбцы двоичного файла, отображённого в память. Атрибуты date, algorithm,
+# operator, kind, start, end - представления данных файла без копирования;
+# dates, algorithms, operators - справочники для номеров в столбцах.
+class ScheduleColumns:
+    def __init__(self, filename):
+        with open(filename, 'rb') as binfile:
+            self._map = mmap.mmap(binfile.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._map[:len(COLUMNS_MAGIC)] != COLUMNS_MAGIC:
+            self._map.close()
+            raise ValueError(f"{filename}: не файл столбцов расписания")
+        preamble = len(COLUMNS_MAGIC) + 4
+        (header_length,) = struct.unpack_from('<I', self._map, len(COLUMNS_MAGIC))
+        header = json.loads(bytes(self._map[preamble:preamble + header_length]))
+        self.rows = header['rows']
+        self.dates = tuple(datetime.date.fromisoformat(value) for value in header['dates'])
+        self.algorithms = tuple(header['algorithms'])
+        self.operators = tuple(header['operators'])
+        self._views = []
+        data = preamble + header_length
+        try:
+            import numpy as np
+        except ImportError:
+            np = None
+        for column in header['columns']:
+            offset = data + column['offset']
+            if np is not None:
+                view = np.frombuffer(self._map, dtype=NUMPY_DTYPES[column['type']], count=self.rows, offset=offset)
+            else:
+                itemsize = array(column['type']).itemsize
+                view = memoryview(self._map)[offset:offset + itemsize * self.rows].cast(column['type'])
+                self._views.append(view)
+            setattr(self, column['name'], view)
+
+    def __len__(self):
+        return self.rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    # memoryview нужно освободить до закрытия mmap; массивы NumPy держат
+    # отображение сами, поэтому после close() их нельзя использовать
+    def close(self):
+        for view in self._views:
+            view.release()
+        self._views = []
+        for name, code in COLUMNS:
+            self.__dict__.pop(name, None)
+        try:
+            self._map.close()
+        except BufferError:
+            # Остались внешние ссылки на массивы; файл закроется вместе с ними
+            pass
+
+    # Записи как в schedule_records - для проверки и небольших выборок
+    def records(self):
+        for date, algorithm, operator, kind, start, end in zip(self.date, self.algorithm, self.operator,
+                                                               self.kind, self.start, self.end):
+            yield (self.dates[date], self.algorithms[algorithm], self.operators[operator],
+                   int(kind), int(start), int(end))
+
+
+def load_schedule_columns(filename):
+    return ScheduleColumns(filename)
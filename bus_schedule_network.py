@@ -0,0 +1,241 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Расписание сети: несколько линий (маршрутов) и депо с общими водителями.
+#
+# Линия задаёт число автобусов, пределы длительности рейса и долю автобусов в
+# час пик; депо - число водителей типов A и B, общих для всех его линий.
+# Расчёт идёт в два шага:
+#   1. Спрос каждой линии - её рейсы при достаточном числе водителей - строится
+#      дискретно-событийной моделью (bus_schedule_events) в пуле процессов:
+#      каждый автобус, пока он на линии по норме часа, ходит без простоя.
+#   2. Рейсы всех линий депо распределяются по общим водителям депо
+#      сканирующей прямой, как в bus_schedule_exact: рейсы просматриваются по
+#      началу, рейс достаётся свободному водителю с наименьшим номером (сначала
+#      тип A), которому хватает часов, а новый водитель берётся, только если
+#      свободных нет. Водитель типа B после TYPE_B_BREAK_INTERVAL минут работы
+#      уходит на TYPE_B_LONG_BREAK. Освободившийся водитель берёт рейс любой
+#      линии депо, поэтому водители переходят между линиями.
+# Рейсы, которым не хватило водителей депо, не обслуживаются и учитываются в
+# статистике линии (unserved = спрос - обслуженные рейсы). Результат для
+# каждого депо - одно ScheduleBoard со всеми линиями и статистика по линиям.
+
+import heapq
+import json
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from bus_schedule_core import (MIN_ROUTE_TIME, MAX_ROUTE_TIME, PEAK_PERCENTAGE, TYPE_A_MINUTES, TYPE_B_MINUTES,
+                               TYPE_B_BREAK_INTERVAL, TYPE_B_LONG_BREAK)
+from bus_schedule_compact import CompactBoard, BREAK, make_roster, _DriverState, _add_route
+from bus_schedule_events import SHIFT_END_MINUTE, simulate_schedule_compact
+from bus_schedule_parallel import default_workers
+
+
+class Route:
+    def __init__(self, name, depot, bus_count, min_route_time=MIN_ROUTE_TIME, max_route_time=MAX_ROUTE_TIME,
+                 peak_percentage=PEAK_PERCENTAGE):
+        self.name = name
+        self.depot = depot
+        self.bus_count = bus_count
+        self.min_route_time = min_route_time
+        self.max_route_time = max_route_time
+        self.peak_percentage = peak_percentage
+
+    def __repr__(self):
+        return (f"Route(name={self.name}, depot={self.depot}, buses={self.bus_count}, "
+                f"route_time={self.min_route_time}-{self.max_route_time}, peak={self.peak_percentage})")
+
+
+class Depot:
+    def __init__(self, name, type_a_drivers, type_b_drivers):
+        self.name = name
+        self.type_a_drivers = type_a_drivers
+        self.type_b_drivers = type_b_drivers
+
+    def __repr__(self):
+        return f"Depot(name={self.name}, type_a={self.type_a_drivers}, type_b={self.type_b_drivers})"
+
+
+# Описание сети из JSON: {"depots": [{"name", "type_a", "type_b"}, ...],
+# "routes": [{"name", "depot", "bus_count", "min_route_time", "max_route_time", "peak_percentage"}, ...]}
+def load_network(path):
+    with open(path, encoding='utf-8') as network_file:
+        network = json.load(network_file)
+    for name in ('depots', 'routes'):
+        if name not in network:
+            raise ValueError(f"В описании сети нет поля {name}")
+    depots = []
+    for number, depot in enumerate(network['depots']):
+        title = f"Депо {depot.get('name', number + 1)}"
+        depots.append(Depot(*(_field(depot, title, name) for name in ('name', 'type_a', 'type_b'))))
+    routes = []
+    for number, route in enumerate(network['routes']):
+        title = f"Линия {route.get('name', number + 1)}"
+        routes.append(_check_route(Route(*(_field(route, title, name) for name in ('name', 'depot', 'bus_count')),
+                                         route.get('min_route_time', MIN_ROUTE_TIME),
+                                         route.get('max_route_time', MAX_ROUTE_TIME),
+                                         route.get('peak_percentage', PEAK_PERCENTAGE))))
+    return routes, depots
+
+
+def _field(entry, title, name):
+    if name not in entry:
+        raise ValueError(f"{title}: не указано поле {name}")
+    return entry[name]
+
+
+def _check_route(route):
+    if not 0 < route.min_route_time <= route.max_route_time <= TYPE_A_MINUTES:
+        raise ValueError(f"Линия {route.name}: длительность рейса должна быть от 1 до {TYPE_A_MINUTES} минут")
+    if not 0 <= route.peak_percentage <= 1:
+        raise ValueError(f"Линия {route.name}: доля автобусов в час пик должна быть от 0 до 1")
+    return route
+
+
+# Водителей типа A на расчёт спроса линии: пул не пустеет. Водитель уходит из
+# пула, когда ему не хватает часов на самый длинный рейс, то есть отработав
+# больше TYPE_A_MINUTES - max_route_time минут; одновременно заняты не больше
+# bus_count водителей, а вся работа линии - не больше bus_count автобусов на
+# всё время до конца смены.
+def _demand_drivers(bus_count, max_route_time):
+    worked = TYPE_A_MINUTES + 1 - max_route_time
+    return bus_count + bus_count * (SHIFT_END_MINUTE + max_route_time) // worked + 1
+
+
+# Спрос одной линии: (начала, концы) рейсов; выполняется в процессе пула
+def _route_task(bus_count, current_date, route_time, peak_percentage, seed):
+    random.seed(seed)
+    board = simulate_schedule_compact(bus_count, _demand_drivers(bus_count, route_time[1]), 0, current_date,
+                                      route_time=route_time, peak_percentage=peak_percentage)
+    return board.starts, board.ends
+
+
+# Распределение рейсов линий депо (plans - (начала, концы) по линиям) по
+# водителям депо. Возвращает CompactBoard с ростером депо, статистику по
+# линиям и число водителей, работавших на нескольких линиях.
+def _reconcile(depot, routes, plans, current_date):
+    type_a_drivers = depot.type_a_drivers
+    roster = tuple(f"{depot.name}:{driver}" for driver in make_roster(type_a_drivers, depot.type_b_drivers))
+    board = CompactBoard(current_date, roster)
+    state = _DriverState(len(roster))
+    since_rest = [0] * len(roster)  # работа водителя типа B с последнего отдыха
+    busy = []   # (время освобождения, водитель)
+    ready = []  # свободные водители по номеру
+    unused = iter(range(len(roster)))
+    order = []  # водители в порядке первого рейса
+    driver_routes = [set() for _ in roster]
+    served = [0] * len(routes)
+    peak = [0] * len(routes)
+    demand = [max(1, len(starts)) for starts, _ in plans]
+    waves = {}  # начало -> [(конец, линия)]
+    for number, (starts, ends) in enumerate(plans):
+        for start, end in zip(starts, ends):
+            waves.setdefault(start, []).append((end, number))
+    shortest = min((end - start for start, wave in waves.items() for end, _ in wave), default=0)
+
+    def limit(driver):
+        return TYPE_A_MINUTES if driver < type_a_drivers else TYPE_B_MINUTES
+
+    def share(number):
+        return served[number] / demand[number]
+
+    for start in sorted(waves):
+        while busy and busy[0][0] <= start:
+            free_at, driver = heapq.heappop(busy)
+            if driver >= type_a_drivers and since_rest[driver] >= TYPE_B_BREAK_INTERVAL:
+                if state.total[driver] + TYPE_B_LONG_BREAK + shortest > limit(driver):
+                    continue  # После перерыва на рейс уже не хватит часов
+                state.add(driver, free_at, free_at + TYPE_B_LONG_BREAK, BREAK)
+                since_rest[driver] = 0
+                heapq.heappush(busy, (free_at + TYPE_B_LONG_BREAK, driver))
+                continue
+            heapq.heappush(ready, driver)
+
+        # Рейсы одного начала достаются сначала линиям с наименьшей обслуженной долей спроса
+        wave = waves[start]
+        while wave:
+            position = min(range(len(wave)), key=lambda position: (share(wave[position][1]), wave[position]))
+            end, number = wave.pop(position)
+            duration = end - start
+            driver = None
+            skipped = []  # Не хватает часов на этот рейс, но хватит на более короткий
+            while ready:
+                candidate = heapq.heappop(ready)
+                if state.total[candidate] + duration <= limit(candidate):
+                    driver = candidate
+                    break
+                if state.total[candidate] + shortest <= limit(candidate):
+                    skipped.append(candidate)
+            for candidate in skipped:
+                heapq.heappush(ready, candidate)
+            if driver is None:
+                driver = next(unused, None)
+                if driver is None:
+                    continue  # Все водители депо заняты или исчерпали лимит: рейс не обслуживается
+                order.append(driver)
+            _add_route(board, state, driver, start, duration)
+            if driver >= type_a_drivers:
+                since_rest[driver] += duration
+            heapq.heappush(busy, (end, driver))
+            driver_routes[driver].add(number)
+            served[number] += 1
+            peak[number] += board.peaks[-1]
+
+    state.build(board, order)
+    board.operator_types += bytes(ord('A') if driver < type_a_drivers else ord('B') for driver in order)
+    statistics = {}
+    for number, (route, (starts, ends)) in enumerate(zip(routes, plans)):
+        statistics[route.name] = {
+            'bus_count': route.bus_count,
+            'demand': len(starts),
+            'itineraries': served[number],
+            'peak_itineraries': peak[number],
+            'drivers': sum(1 for numbers in driver_routes if number in numbers),
+            'unserved': len(starts) - served[number],
+        }
+    shared = sum(1 for numbers in driver_routes if len(numbers) > 1)
+    return board, statistics, shared
+
+
+# Расписание сети на дату. Возвращает {депо: {'schedule': ScheduleBoard,
+# 'routes': {линия: статистика}, 'drivers': число водителей,
+# 'shared_drivers': водители, работающие на нескольких линиях}} в порядке депо.
+def schedule_network(routes, depots, current_date, workers=None, seed=None):
+    depots_by_name = {}
+    for depot in depots:
+        if depot.name in depots_by_name:
+            raise ValueError(f"Депо {depot.name} указано дважды")
+        depots_by_name[depot.name] = depot
+    names = set()
+    for route in routes:
+        if route.depot not in depots_by_name:
+            raise ValueError(f"Линия {route.name}: неизвестное депо {route.depot}")
+        if route.name in names:
+            raise ValueError(f"Линия {route.name} указана дважды")
+        _check_route(route)
+        names.add(route.name)
+    if seed is None:
+        seed = random.randrange(2**32)
+
+    arguments = [(route.bus_count, current_date, (route.min_route_time, route.max_route_time),
+                  route.peak_percentage, f"{seed}:{route.depot}:{route.name}") for route in routes]
+    workers = workers or default_workers(len(arguments))
+    if workers > 1 and len(arguments) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            plans = list(executor.map(_route_task, *zip(*arguments)))
+    else:
+        plans = [_route_task(*task) for task in arguments]
+
+    results = {}
+    for depot in depots:
+        depot_routes = [(route, plan) for route, plan in zip(routes, plans) if route.depot == depot.name]
+        board, statistics, shared = _reconcile(depot, [route for route, _ in depot_routes],
+                                               [plan for _, plan in depot_routes], current_date)
+        results[depot.name] = {
+            'schedule': board.to_schedule_board(),
+            'routes': statistics,
+            'drivers': len(board.operators),
+            'shared_drivers': shared,
+        }
+    return results
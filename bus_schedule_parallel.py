@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Параллельный генетический алгоритм: островная модель на пуле процессов.
+#
+# Общая популяция делится на несколько островов. Каждый остров эволюционирует
+# в отдельном процессе migration_interval поколений, после чего лучшие
+# расписания острова переходят на следующий остров по кольцу, заменяя худшие.
+# Каждая задача засевает генератор случайных чисел из (seed, остров, эпоха),
+# поэтому при фиксированном seed результат не зависит от числа процессов.
+
+import copy
+import math
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from bus_schedule_core import (POPULATION_SIZE_GA, GENERATIONS_GA, assess_schedule,
+                               generate_initial_schedule, evolve_population,
+                               combine_schedules, alter_schedule)
+from bus_schedule_compact import (generate_initial_schedule_compact, combine_compact_schedules,
+                                  alter_compact_schedule)
+
+ISLANDS_GA = 4
+MIGRATION_INTERVAL_GA = 25
+MIGRANTS_GA = 2
+
+
+# Число процессов по умолчанию: не больше числа задач и ядер
+def default_workers(tasks):
+    return max(1, min(tasks, os.cpu_count() or 1))
+
+
+# Генерация одного начального расписания с собственным зерном. Расписание
+# строится в компактном представлении: его передача между процессами намного
+# дешевле, чем ScheduleBoard с datetime.
+def _initial_schedule_task(bus_count, type_a_drivers, type_b_drivers, current_date, seed):
+    random.seed(seed)
+    return generate_initial_schedule_compact(bus_count, type_a_drivers, type_b_drivers, current_date)
+
+
+# Эпоха эволюции одного острова: при первой эпохе остров создаёт свою популяцию сам
+def _island_epoch_task(job, population, island_size, generations, seed, compact=False):
+    random.seed(seed)
+    generate, combine, alter = ((generate_initial_schedule_compact, combine_compact_schedules, alter_compact_schedule)
+                                if compact else (generate_initial_schedule, combine_schedules, alter_schedule))
+    if population is None:
+        bus_count, type_a_drivers, type_b_drivers, current_date = job
+        population = [generate(bus_count, type_a_drivers, type_b_drivers, current_date)
+                      for _ in range(island_size)]
+    return evolve_population(population, generations, island_size, combine, alter)
+
+
+def _map(executor, function, *iterables):
+    if executor is None:
+        return list(map(function, *iterables))
+    return list(executor.map(function, *iterables))
+
+
+# Генерация начальной популяции в пуле процессов; используется
+# genetic_optimizer(..., workers=N). Каждое расписание получает своё зерно из
+# seed, поэтому результат не зависит от числа процессов; при workers <= 1
+# расписания строятся последовательно в этом процессе.
+def parallel_initial_population(bus_count, type_a_drivers, type_b_drivers, current_date,
+                                size=POPULATION_SIZE_GA, workers=None, seed=None):
+    if seed is None:
+        seed = random.randrange(2**32)
+    workers = workers or default_workers(size)
+    arguments = ([bus_count] * size, [type_a_drivers] * size, [type_b_drivers] * size, [current_date] * size,
+                 [f"{seed}:initial:{i}" for i in range(size)])
+    if workers > 1 and size > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, size)) as executor:
+            boards = list(executor.map(_initial_schedule_task, *arguments, chunksize=math.ceil(size / workers)))
+    else:
+        boards = list(map(_initial_schedule_task, *arguments))
+    return [board.to_schedule_board() for board in boards]
+
+
+# Кольцевая миграция: лучшие расписания острова заменяют худшие на следующем.
+# Мигранты копируются, чтобы острова не делили изменяемые объекты - иначе
+# последовательный режим давал бы другой результат, чем пул процессов.
+def migrate(populations, migrants=MIGRANTS_GA):
+    migrants_by_island = [copy.deepcopy(population[:migrants]) for population in populations]
+    for index, population in enumerate(populations):
+        incoming = migrants_by_island[index - 1]
+        if incoming and len(population) > len(incoming):
+            population[-len(incoming):] = incoming
+        population.sort(key=assess_schedule, reverse=True)
+    return populations
+
+
+# Островной генетический алгоритм
+def island_genetic_optimizer(bus_count, type_a_drivers, type_b_drivers, current_date,
+                             islands=ISLANDS_GA, migration_interval=MIGRATION_INTERVAL_GA,
+                             migrants=MIGRANTS_GA, workers=None, seed=None,
+                             population_size=POPULATION_SIZE_GA, generations=GENERATIONS_GA,
+                             compact=False):
+    if islands < 1 or migration_interval < 1:
+        raise ValueError("islands и migration_interval должны быть положительными")
+    if seed is None:
+        seed = random.randrange(2**32)
+    job = (bus_count, type_a_drivers, type_b_drivers, current_date)
+    island_size = max(2, population_size // islands)
+    workers = workers or default_workers(islands)
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+
+    try:
+        populations = [None] * islands
+        done = 0
+        epoch = 0
+        while done < generations or epoch == 0:
+            epoch_generations = min(migration_interval, generations - done)
+            seeds = [f"{seed}:island:{island}:epoch:{epoch}" for island in range(islands)]
+            populations = _map(executor, _island_epoch_task, [job] * islands, populations,
+                               [island_size] * islands, [epoch_generations] * islands, seeds,
+                               [compact] * islands)
+            done += epoch_generations
+            epoch += 1
+            if done < generations and islands > 1:
+                populations = migrate(populations, migrants)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    best = [population[0] for population in populations]
+    best.sort(key=assess_schedule, reverse=True)
+    # Результат - ScheduleBoard, как у остальных оптимизаторов
+    return best[0].to_schedule_board() if compact else best[0]
@@ -0,0 +1,130 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Профилирование генетического алгоритма и прямого алгоритма.
+#
+# Замеры включаются только внутри `with Profiler() as profiler:`: алгоритмы ядра
+# один раз при входе читают текущий профилировщик (core.current_profiler) и без
+# него работают как раньше. Профилировщик собирает:
+#   - интервалы (span): create_linear_schedule с временем выбора водителей и
+#     назначения рейсов, начальная популяция, весь genetic_optimizer;
+#   - записи поколений: время фаз (sort - оценка и отбор родителей, combine,
+#     alter, select - отбор следующего поколения), лучшая, средняя и худшая
+#     оценка и разнообразие - доля различных троек calculate_statistics.
+# Каждое событие передаётся on_event сразу после записи. Результат сохраняется
+# в JSON (save_json) или в формате Chrome trace (save_chrome_trace) для
+# chrome://tracing и Perfetto.
+#
+# Замеры выполняются в текущем процессе: островная модель и пулы процессов
+# профилировщик не видят.
+
+import json
+import os
+import threading
+import time
+
+import bus_schedule_core as core
+
+
+class Profiler:
+    def __init__(self, on_event=None):
+        self.on_event = on_event
+        # Интервалы: {'name', 'category', 'start', 'duration', 'phases', 'args'}, время в секундах
+        self.spans = []
+        # Поколения: {'generation', 'start', 'duration', 'phases', 'best', 'mean', 'worst', 'diversity'}
+        self.generations = []
+        self.clock = time.perf_counter
+        self._origin = self.clock()
+        self._totals = {}
+        self._previous = None
+
+    def __enter__(self):
+        self._previous = core.set_profiler(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        core.set_profiler(self._previous)
+        self._previous = None
+
+    # Обёртка, суммирующая время вызовов function под именем name
+    def accumulate(self, name, function):
+        totals = self._totals
+        clock = self.clock
+
+        def timed(*args):
+            started = clock()
+            try:
+                return function(*args)
+            finally:
+                totals[name] = totals.get(name, 0.0) + clock() - started
+        return timed
+
+    # Накопленное время по именам (и сброс накопителей)
+    def take(self, *names):
+        return {name: self._totals.pop(name, 0.0) for name in names}
+
+    def span(self, name, category, started, phases=None, args=None):
+        event = {'name': name, 'category': category, 'start': started - self._origin,
+                 'duration': self.clock() - started, 'phases': phases or {}, 'args': args or {}}
+        self.spans.append(event)
+        if self.on_event is not None:
+            self.on_event(event)
+
+    def generation(self, generation, started, phases, fitness, diversity):
+        event = {'name': 'generation', 'generation': generation, 'start': started - self._origin,
+                 'duration': self.clock() - started, 'phases': phases,
+                 'best': max(fitness), 'mean': sum(fitness) / len(fitness), 'worst': min(fitness),
+                 'diversity': diversity}
+        self.generations.append(event)
+        if self.on_event is not None:
+            self.on_event(event)
+
+    # Суммарное время фаз по всем поколениям
+    def phase_totals(self):
+        totals = {}
+        for record in self.generations:
+            for phase, duration in record['phases'].items():
+                totals[phase] = totals.get(phase, 0.0) + duration
+        return totals
+
+    def to_dict(self):
+        return {'spans': self.spans, 'generations': self.generations, 'phase_totals': self.phase_totals()}
+
+    def save_json(self, filename):
+        with open(filename, 'w', encoding='utf-8') as output:
+            json.dump(self.to_dict(), output, ensure_ascii=False, indent=1)
+
+    # События в формате Chrome trace: интервалы "X" в микросекундах и счётчики "C"
+    # для оценок и разнообразия. Фазы поколения идут подряд внутри его интервала:
+    # combine и alter чередуются, поэтому показывается их суммарное время.
+    def chrome_trace(self):
+        pid = os.getpid()
+        tid = threading.get_ident()
+        events = []
+
+        def complete(name, category, start, duration, args=None):
+            events.append({'name': name, 'cat': category, 'ph': 'X', 'pid': pid, 'tid': tid,
+                           'ts': round(start * 1e6, 3), 'dur': round(duration * 1e6, 3), 'args': args or {}})
+
+        for span in self.spans:
+            args = dict(span['args'])
+            args.update({f'{phase}_ms': round(duration * 1000, 3) for phase, duration in span['phases'].items()})
+            complete(span['name'], span['category'], span['start'], span['duration'], args)
+        for record in self.generations:
+            complete('generation', 'genetic', record['start'], record['duration'],
+                     {'generation': record['generation'], 'best': record['best'], 'mean': record['mean'],
+                      'worst': record['worst'], 'diversity': record['diversity']})
+            start = record['start']
+            for phase, duration in record['phases'].items():
+                complete(phase, 'genetic', start, duration)
+                start += duration
+            timestamp = round(record['start'] * 1e6, 3)
+            events.append({'name': 'fitness', 'ph': 'C', 'pid': pid, 'tid': tid, 'ts': timestamp,
+                           'args': {'best': record['best'], 'mean': record['mean'], 'worst': record['worst']}})
+            events.append({'name': 'diversity', 'ph': 'C', 'pid': pid, 'tid': tid, 'ts': timestamp,
+                           'args': {'diversity': record['diversity']}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save_chrome_trace(self, filename):
+        with open(filename, 'w', encoding='utf-8') as output:
+            json.dump(self.chrome_trace(), output)
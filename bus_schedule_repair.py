@@ -0,0 +1,397 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Частичный пересчёт готового расписания при сбое в течение дня.
+#
+# ScheduleRepairer один раз строит индексы по ScheduleBoard (O(n log n)):
+# записи каждого водителя, отсортированные по началу, и рейсы по времени
+# отправления. После этого каждый сбой меняет только затронутые рейсы с момента
+# at и дальше; всё, что началось раньше, и назначения остальных водителей не
+# трогаются:
+#   - remove_operator(operator_id, at) - водитель выбыл: его рейсы с at
+#     передаются другим водителям, перерывы после at удаляются;
+#   - change_bus_count(bus_count, at) - число автобусов на линии изменилось
+#     (исходное число передаётся в ScheduleRepairer(..., bus_count=N)): в
+#     каждой волне отправлений с at добавляется или снимается только разница
+#     норм (PEAK_PERCENTAGE в час пик, как в прямом алгоритме) для нового и
+#     прежнего числа автобусов. Разница умножается на отношение рейсов волны к
+#     норме при построении: вне часа пик прямой алгоритм даёт на автобус рейсы
+#     водителей обоих типов. Волна - рейсы одной длительности, каждый из
+#     которых начинается раньше, чем кончается предыдущий: перерыв водителя
+#     типа B сдвигает остаток волны на TYPE_B_LONG_BREAK. При том же числе
+#     автобусов расписание не меняется. Волны, которых в расписании нет (в
+#     них не было ни одного рейса), восстанавливаются в ритме прямого
+#     алгоритма: следующая волна - через рейс и среднюю пересменку, рейсы
+#     такой волны длятся EXACT_ROUTE_TIME.
+# Стоимость - O(k log e) на k затронутых рейсов плюс поиск водителя. Водители
+# каждого типа лежат в дереве отрезков по отработанному времени (как в
+# DriverAvailabilityIndex): первый водитель, которому хватает часов на рейс,
+# находится за O(log n), а проверяются на занятость (бинарный поиск по его
+# записям) и, для типа B, на TYPE_B_BREAK_INTERVAL работы между перерывами
+# только такие водители.
+#
+# Расписание меняется на месте. Рейс, для которого не нашлось водителя,
+# снимается и попадает в отчёт. Порядок board.itineraries после снятия рейсов
+# может измениться (снятие - обмен с последним элементом).
+
+import bisect
+import datetime
+
+from bus_schedule_core import (TYPE_A_HOURS, TYPE_B_HOURS, TYPE_B_BREAK_INTERVAL, PEAK_PERCENTAGE, MIN_CHANGE_TIME,
+                               START_OF_SHIFT, ONE_MINUTE, Itinerary, is_peak_time, is_off_day)
+from bus_schedule_exact import EXACT_ROUTE_TIME, EXACT_CHANGE_TIME
+
+TYPE_A_LIMIT = datetime.timedelta(hours=TYPE_A_HOURS)
+TYPE_B_LIMIT = datetime.timedelta(hours=TYPE_B_HOURS)
+TYPE_B_BREAK_LIMIT = datetime.timedelta(minutes=TYPE_B_BREAK_INTERVAL)
+# Ритм восстановленных волн
+WAVE_ROUTE_TIME = datetime.timedelta(minutes=EXACT_ROUTE_TIME)
+WAVE_CHANGE_TIME = datetime.timedelta(minutes=EXACT_CHANGE_TIME)
+MIN_CHANGE = datetime.timedelta(minutes=MIN_CHANGE_TIME)
+# Отправления прямого алгоритма идут до 23:59
+DAY_END = datetime.time(23, 59)
+
+
+# Волна отправлений: начала её частей (перерыв водителя типа B сдвигает
+# остаток волны), длительность рейсов, число автобусов на линии, число рейсов,
+# которое волна должна иметь при этом числе автобусов, и отношение рейсов волны
+# к норме прямого алгоритма
+class _Wave:
+    __slots__ = ('starts', 'duration', 'bus_count', 'target', 'ratio')
+
+    def __init__(self, start, duration, bus_count, target=0, ratio=1):
+        self.starts = [start]
+        self.duration = duration
+        self.bus_count = bus_count
+        self.target = target
+        self.ratio = ratio
+
+    def __repr__(self):
+        return f"_Wave(start={self.starts[0]:%H:%M}, parts={len(self.starts)}, bus_count={self.bus_count})"
+
+
+# Водители одного типа в порядке расписания: дерево отрезков минимумов
+# отработанного времени, как у водителей типа A в DriverAvailabilityIndex.
+# Выбывший водитель получает _NEVER и больше не находится.
+class _OperatorIndex:
+    _NEVER = datetime.timedelta.max
+
+    def __init__(self, operators, limit):
+        self.operators = operators
+        self.limit = limit
+        size = 1
+        while size < len(operators):
+            size *= 2
+        self._size = size
+        self._tree = [self._NEVER] * (2 * size)
+        for position, operator in enumerate(operators):
+            self._tree[size + position] = operator.total_time
+        for node in range(size - 1, 0, -1):
+            self._tree[node] = min(self._tree[2 * node], self._tree[2 * node + 1])
+
+    def update(self, position, total_time):
+        node = self._size + position
+        self._tree[node] = total_time
+        node //= 2
+        while node:
+            self._tree[node] = min(self._tree[2 * node], self._tree[2 * node + 1])
+            node //= 2
+
+    # Первая позиция не меньше first, у водителя на которой отработано не
+    # больше max_total; None, если такой нет
+    def find(self, first, max_total):
+        return self._find(1, 0, self._size, first, max_total)
+
+    def _find(self, node, low, high, first, max_total):
+        if high <= first or self._tree[node] > max_total:
+            return None
+        if high - low == 1:
+            return low
+        middle = (low + high) // 2
+        found = self._find(2 * node, low, middle, first, max_total)
+        return found if found is not None else self._find(2 * node + 1, middle, high, first, max_total)
+
+
+class ScheduleRepairer:
+    # bus_count - число автобусов, для которого построено расписание; нужно
+    # только для change_bus_count
+    def __init__(self, schedule, current_date, bus_count=None):
+        self.schedule = schedule
+        self.current_date = current_date
+        self.off_day = is_off_day(current_date)
+        self._operators = {operator.id: operator for operator in schedule.operators}
+        # Записи водителя отсортированы по началу; _starts - их начала для bisect
+        self._starts = {}
+        for operator in schedule.operators:
+            operator.schedule.sort(key=lambda entry: entry[0])
+            self._starts[operator.id] = [entry[0] for entry in operator.schedule]
+        # Водители по типам (сначала A) и их места в индексах
+        self._indexes = []
+        self._places = {}
+        for operator_type, limit in (('A', TYPE_A_LIMIT), ('B', TYPE_B_LIMIT)):
+            operators = [operator for operator in self._operators.values() if operator.type == operator_type]
+            for position, operator in enumerate(operators):
+                self._places[operator.id] = (len(self._indexes), position)
+            self._indexes.append(_OperatorIndex(operators, limit))
+        # Рейсы по времени отправления и позиции в schedule.itineraries
+        self._positions = {}
+        self._departures = {}
+        for position, itinerary in enumerate(schedule.itineraries):
+            self._positions[id(itinerary)] = position
+            self._departures.setdefault(itinerary.start, []).append(itinerary)
+        self._bus_count = bus_count
+        self._waves = self._group_waves(bus_count)
+        self._wave_starts = [wave.starts[0] for wave in self._waves]
+
+    # Волны расписания по началу. Следующая волна прямого алгоритма начинается
+    # не раньше конца рейсов предыдущей и пересменки, а часть волны после
+    # перерыва - через TYPE_B_LONG_BREAK, раньше конца рейсов.
+    def _group_waves(self, bus_count):
+        waves = []
+        for start in sorted(self._departures):
+            itineraries = self._departures[start]
+            duration = itineraries[0].end - itineraries[0].start
+            wave = waves[-1] if waves else None
+            if wave is not None and wave.duration == duration and start < wave.starts[-1] + duration:
+                wave.starts.append(start)
+            else:
+                waves.append(_Wave(start, duration, bus_count))
+        for wave in waves:
+            wave.target = sum(len(self._departures[start]) for start in wave.starts)
+            slots = self._slot_count(bus_count, wave.starts[0]) if bus_count is not None else 0
+            wave.ratio = wave.target / slots if slots and wave.target else 1
+        return waves
+
+    # Водитель выбыл с момента at. Возвращает отчёт о пересчёте.
+    def remove_operator(self, operator_id, at):
+        operator = self._operators.get(operator_id)
+        if operator is None or operator_id not in self._places:
+            raise ValueError(f"Водителя {operator_id} нет в расписании")
+        place = self._places.pop(operator_id)
+        self._indexes[place[0]].update(place[1], _OperatorIndex._NEVER)
+        report = _report()
+        starts = self._starts[operator_id]
+        first = bisect.bisect_left(starts, at)
+        affected = operator.schedule[first:]
+        del operator.schedule[first:]
+        del starts[first:]
+        for start, end, kind in affected:
+            operator.total_time -= end - start
+        for start, end, kind in affected:
+            if kind != 'route':
+                continue
+            itinerary = self._find_itinerary(start, operator_id)
+            if self._assign(itinerary, report) is not None:
+                report['reassigned'].append(itinerary)
+        if not operator.schedule:
+            self.schedule.operators.remove(operator)
+        self.schedule.invalidate()
+        return report
+
+    # Число автобусов на линии с момента at. Волна, где рейсов меньше нормы (не
+    # хватило водителей), при увеличении числа автобусов добирается до новой
+    # нормы, а при уменьшении теряет только рейсы сверх неё. Новые рейсы волны
+    # получают длительность её рейсов и начало её последней части. Возвращает
+    # отчёт о пересчёте.
+    def change_bus_count(self, bus_count, at):
+        if self._bus_count is None:
+            raise ValueError("Исходное число автобусов не задано: ScheduleRepairer(..., bus_count=N)")
+        report = _report()
+        for wave in self._affected_waves(at):
+            first = wave.starts[0]
+            target = max(0, wave.target + round((self._slot_count(bus_count, first)
+                                                 - self._slot_count(wave.bus_count, first)) * wave.ratio))
+            if target == wave.target:
+                wave.bus_count = bus_count
+                continue
+            change = target - sum(len(self._departures[start]) for start in wave.starts)
+            if target < wave.target:
+                change = min(change, 0)
+            wave.bus_count, wave.target = bus_count, target
+            for _ in range(-change):
+                itineraries = next((self._departures[start] for start in reversed(wave.starts)
+                                    if self._departures[start]), None)
+                if itineraries is None:
+                    break
+                itinerary = itineraries[-1]
+                self._unassign(itinerary)
+                self._drop(itinerary)
+                report['removed'].append(itinerary)
+            # Водитель, не подошедший рейсу волны, не подойдёт и следующему такому же:
+            # поиск продолжается с места предыдущей находки
+            cursor = (0, 0)
+            start = wave.starts[-1]
+            for _ in range(change):
+                itinerary = Itinerary(start, wave.duration // ONE_MINUTE, None)
+                cursor = self._assign(itinerary, report, new=True, cursor=cursor)
+                if cursor is None:
+                    break  # Свободных водителей нет - остальные рейсы волны тоже не назначить
+                report['added'].append(itinerary)
+        self.schedule.invalidate()
+        return report
+
+    # Волны, начинающиеся с at, вместе с недостающими: после волны следующая
+    # идёт через её рейс и среднюю пересменку, если до следующей волны
+    # расписания остаётся время на рейс и пересменку, и так до конца дня.
+    # Восстановленная волна получает прежнее число автобусов предыдущей волны и
+    # запоминается, только если в неё назначен рейс.
+    def _affected_waves(self, at):
+        shift_start = datetime.datetime.combine(self.current_date, START_OF_SHIFT)
+        day_end = datetime.datetime.combine(self.current_date, DAY_END)
+        waves, wave_starts = self._waves, self._wave_starts
+        position = bisect.bisect_left(wave_starts, at)
+        # Ритм отсчитывается от последней волны до at или от начала смены
+        previous = waves[position - 1] if position else None
+        bus_count = previous.bus_count if previous is not None else waves[0].bus_count if waves else self._bus_count
+        if previous is None and (not waves or wave_starts[0] > shift_start):
+            previous = _Wave(shift_start - WAVE_ROUTE_TIME - WAVE_CHANGE_TIME, WAVE_ROUTE_TIME, bus_count)
+        for following in waves[position:] + [None]:
+            if previous is not None:
+                limit = day_end if following is None else following.starts[0] - WAVE_ROUTE_TIME - MIN_CHANGE
+                current = previous.starts[-1] + previous.duration + WAVE_CHANGE_TIME
+                while current <= limit and current < day_end:
+                    wave = _Wave(current, WAVE_ROUTE_TIME, bus_count)
+                    if current >= at:
+                        self._departures[current] = []
+                        yield wave
+                        if self._departures[current]:
+                            insert = bisect.bisect_left(wave_starts, current)
+                            wave_starts.insert(insert, current)
+                            waves.insert(insert, wave)
+                        else:
+                            del self._departures[current]
+                    previous = wave
+                    current += WAVE_ROUTE_TIME + WAVE_CHANGE_TIME
+            if following is not None:
+                bus_count = following.bus_count  # до изменения волны вызывающим
+                yield following
+            previous = following
+
+    def _slot_count(self, bus_count, start):
+        if is_peak_time(start.time()) and not self.off_day:
+            return int(bus_count * PEAK_PERCENTAGE)
+        return int(bus_count * (1 - PEAK_PERCENTAGE if not self.off_day else 1))
+
+    def _find_itinerary(self, start, operator_id):
+        for itinerary in self._departures.get(start, ()):
+            if itinerary.driver == operator_id:
+                return itinerary
+        raise ValueError(f"Рейс водителя {operator_id} в {start:%H:%M} не найден среди рейсов расписания")
+
+    # Может ли водитель, которому хватает часов, взять рейс: свободен на время
+    # рейса, а водитель типа B - ещё и не работает без перерыва слишком долго
+    def _fits(self, operator, start, end):
+        starts = self._starts[operator.id]
+        position = bisect.bisect_left(starts, end)
+        if position and operator.schedule[position - 1][1] > start:
+            return False
+        return operator.type == 'A' or self._rested(operator.schedule, position, end - start)
+
+    # Водитель типа B: в отрезке работы между перерывами, куда попадает рейс,
+    # последний рейс должен начинаться раньше TYPE_B_BREAK_INTERVAL минут работы
+    @staticmethod
+    def _rested(entries, position, duration):
+        worked = duration
+        last = duration
+        for index in range(position - 1, -1, -1):
+            start, end, kind = entries[index]
+            if kind != 'route':
+                break
+            worked += end - start
+        for index in range(position, len(entries)):
+            start, end, kind = entries[index]
+            if kind != 'route':
+                break
+            worked += end - start
+            last = end - start
+        return worked - last < TYPE_B_BREAK_LIMIT
+
+    # Назначение рейса первому подходящему водителю (сначала тип A), начиная с
+    # места cursor = (индекс типа, позиция). Возвращает место водителя; без
+    # водителя рейс снимается.
+    def _assign(self, itinerary, report, new=False, cursor=(0, 0)):
+        duration = itinerary.end - itinerary.start
+        operator = None
+        for kind in range(cursor[0], len(self._indexes)):
+            index = self._indexes[kind]
+            position = cursor[1] if kind == cursor[0] else 0
+            while True:
+                position = index.find(position, index.limit - duration)
+                if position is None:
+                    break
+                if self._fits(index.operators[position], itinerary.start, itinerary.end):
+                    operator = index.operators[position]
+                    break
+                position += 1
+            if operator is not None:
+                break
+        else:
+            if not new:
+                self._drop(itinerary)
+            report['unassigned'].append(itinerary)
+            return None
+        itinerary.driver = operator.id
+        starts = self._starts[operator.id]
+        entry = bisect.bisect_left(starts, itinerary.start)
+        starts.insert(entry, itinerary.start)
+        operator.schedule.insert(entry, (itinerary.start, itinerary.end, 'route'))
+        operator.total_time += duration
+        index.update(position, operator.total_time)
+        if new:
+            self._positions[id(itinerary)] = len(self.schedule.itineraries)
+            self.schedule.itineraries.append(itinerary)
+            self._departures[itinerary.start].append(itinerary)
+        return kind, position
+
+    # Снятие рейса с водителя (запись в его смене). В начальных расписаниях
+    # генетического алгоритма водителя рейса может не быть среди operators.
+    def _unassign(self, itinerary):
+        operator = self._operators.get(itinerary.driver)
+        if operator is None:
+            return
+        starts = self._starts[itinerary.driver]
+        position = bisect.bisect_left(starts, itinerary.start)
+        while operator.schedule[position][2] != 'route':
+            position += 1
+        del starts[position]
+        del operator.schedule[position]
+        operator.total_time -= itinerary.end - itinerary.start
+        place = self._places.get(operator.id)
+        if place is not None:
+            self._indexes[place[0]].update(place[1], operator.total_time)
+
+    # Удаление рейса из расписания: обмен с последним рейсом списка, O(1)
+    def _drop(self, itinerary):
+        itineraries = self.schedule.itineraries
+        position = self._positions.pop(id(itinerary))
+        last = itineraries.pop()
+        if last is not itinerary:
+            itineraries[position] = last
+            self._positions[id(last)] = position
+        self._departures[itinerary.start].remove(itinerary)
+
+
+def _report():
+    return {'reassigned': [], 'unassigned': [], 'added': [], 'removed': []}
+
+
+# Разовый пересчёт: водитель operator_id выбыл в at (datetime или time дня расписания)
+def remove_operator(schedule, current_date, operator_id, at):
+    return ScheduleRepairer(schedule, current_date).remove_operator(operator_id, _moment(current_date, at))
+
+
+# Разовый пересчёт: расписание построено для initial_bus_count автобусов, с at
+# на линии bus_count автобусов
+def change_bus_count(schedule, current_date, initial_bus_count, bus_count, at):
+    return ScheduleRepairer(schedule, current_date, initial_bus_count).change_bus_count(bus_count,
+                                                                                      _moment(current_date, at))
+
+
+# Время дня после полуночи относится к следующим суткам смены
+def _moment(current_date, at):
+    if isinstance(at, datetime.datetime):
+        return at
+    moment = datetime.datetime.combine(current_date, at)
+    if at < START_OF_SHIFT:
+        moment += datetime.timedelta(days=1)
+    return moment
@@ -0,0 +1,367 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Локальная служба расписания: HTTP/JSON на asyncio без сторонних пакетов.
+#
+# Служба слушает только адрес обратной петли (127.0.0.1, ::1, localhost) и
+# отвечает на запросы:
+#   - POST /schedule - тело JSON {"bus_count", "type_a", "type_b", "date"
+#     (YYYY-MM-DD), "algorithm" ('linear', 'genetic', 'exact', 'both', 'all'),
+#     необязательные "backend", "seed", "validate", "metrics_only"}; числа
+#     автобусов и водителей - не больше max_count. Ответ - JSON Lines с
+#     Transfer-Encoding: chunked: строка на алгоритм в порядке готовности, в
+#     формате bus_schedule_cli;
+#   - GET /metrics - глубина очереди, число запросов и объединённых расчётов,
+#     задержки (p50, p95, p99, максимум) за последние LATENCY_WINDOW запросов;
+#   - GET /health - {"status": "ok"}.
+# Каждый алгоритм задания - отдельный расчёт в пуле из workers процессов;
+# одновременно выполняется не больше workers расчётов, остальные ждут в
+# очереди. Если в очереди уже max_queue расчётов, новый запрос получает 503.
+# Одинаковые расчёты (те же параметры, алгоритм, бэкенд и зерно), пришедшие,
+# пока первый ещё не готов, не запускаются повторно: все запросы получают
+# результат одного расчёта. Отключение клиента не прерывает расчёт, который
+# ждут другие запросы.
+#
+# Процессы пула запускаются через spawn и не наследуют сокет службы; по
+# SIGTERM или SIGINT служба перестаёт принимать соединения и дожидается
+# завершения процессов пула, а после SIGKILL службы они завершаются сами.
+#
+# Пример:
+#   python bus_schedule_service.py --port 8765 --workers 4
+# Нагрузочный клиент - bus_schedule_client.py.
+
+import argparse
+import asyncio
+import collections
+import datetime
+import ipaddress
+import json
+import multiprocessing
+import os
+import signal
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import bus_schedule_cli as cli
+from bus_schedule_parallel import default_workers
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_MAX_QUEUE = 64
+# Наибольшее число автобусов и водителей каждого типа в запросе. Номера
+# водителей компактного представления - int16, поэтому предел не выше 32767.
+DEFAULT_MAX_COUNT = 1000
+COUNT_LIMIT = 2**15 - 1
+LATENCY_WINDOW = 1000
+MAX_BODY_BYTES = 64 * 1024
+
+ALGORITHM_CHOICES = {'linear': ['linear'], 'genetic': ['genetic'], 'exact': ['exact'],
+                     'both': ['linear', 'genetic'], 'all': ['linear', 'genetic', 'exact']}
+
+_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+            413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def is_loopback(host):
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+# Целое поле запроса: bool, дробные числа и строки не принимаются
+def _integer(payload, name, default=None):
+    value = payload.get(name, default)
+    if value is not None and (isinstance(value, bool) or not isinstance(value, int)):
+        raise RequestError(400, f"{name} должно быть целым числом")
+    return value
+
+
+def _string(payload, name, default):
+    value = payload.get(name, default)
+    if not isinstance(value, str):
+        raise RequestError(400, f"{name} должно быть строкой")
+    return value
+
+
+def _flag(payload, name):
+    value = payload.get(name, False)
+    if not isinstance(value, bool):
+        raise RequestError(400, f"{name} должно быть true или false")
+    return value
+
+
+# Разбор тела POST /schedule: (задание, алгоритмы, параметры расчёта)
+def parse_schedule_request(payload, max_count=DEFAULT_MAX_COUNT):
+    if not isinstance(payload, dict):
+        raise RequestError(400, "Ожидается объект JSON")
+    for name in ('bus_count', 'type_a', 'type_b', 'date'):
+        if name not in payload:
+            raise RequestError(400, f"Не указано поле {name}")
+    counts = [_integer(payload, name) for name in ('bus_count', 'type_a', 'type_b')]
+    if min(counts) < 0:
+        raise RequestError(400, "Число автобусов и водителей не может быть отрицательным")
+    if max(counts) > max_count:
+        raise RequestError(400, f"Число автобусов и водителей каждого типа - не больше {max_count}")
+    try:
+        current_date = datetime.datetime.strptime(_string(payload, 'date', None), '%Y-%m-%d').date()
+    except ValueError as e:
+        raise RequestError(400, f"Неверная дата: {e}")
+    job = (*counts, current_date)
+    algorithm = _string(payload, 'algorithm', 'both')
+    algorithms = ALGORITHM_CHOICES.get(algorithm)
+    if algorithms is None:
+        raise RequestError(400, f"Неизвестный алгоритм: {algorithm}")
+    backend = _string(payload, 'backend', 'objects')
+    if backend not in cli.BACKENDS:
+        raise RequestError(400, f"Неизвестный бэкенд: {backend}")
+    options = (backend, _integer(payload, 'seed'), _flag(payload, 'validate'), not _flag(payload, 'metrics_only'))
+    return job, algorithms, options
+
+
+# Процессы пула не реагируют на Ctrl+C (их останавливает служба) и завершаются
+# сами, если служба убита без возможности их остановить (SIGKILL)
+def _init_worker(parent):
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    threading.Thread(target=_watch_parent, args=(parent,), daemon=True).start()
+
+
+def _watch_parent(parent):
+    while os.getppid() == parent:
+        time.sleep(1)
+    os._exit(1)
+
+
+# Один алгоритм одного задания; выполняется в процессе пула
+def _compute_task(job, key, backend, seed, validate, include_schedule):
+    result = next(cli.run_job(0, job, [key], seed, include_schedule, backend=backend, validate=validate))
+    del result['job']
+    return result
+
+
+class ScheduleService:
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, workers=None, max_queue=DEFAULT_MAX_QUEUE,
+                 max_count=DEFAULT_MAX_COUNT):
+        if not is_loopback(host):
+            raise ValueError(f"Служба работает только на адресе обратной петли, а не на {host}")
+        if max_queue < 1:
+            raise ValueError("max_queue должно быть не меньше 1")
+        if not 0 < max_count <= COUNT_LIMIT:
+            raise ValueError(f"max_count должно быть от 1 до {COUNT_LIMIT}")
+        self.host = host
+        self.port = port
+        self.workers = workers or default_workers(sys.maxsize)
+        self.max_queue = max_queue
+        self.max_count = max_count
+        self._executor = None
+        self._server = None
+        self._slots = None
+        self._inflight = {}  # ключ расчёта -> asyncio.Task
+        self._queued = 0
+        self._running = 0
+        self._latencies = collections.deque(maxlen=LATENCY_WINDOW)
+        self.counters = {'requests': 0, 'computations': 0, 'coalesced': 0, 'rejected': 0, 'errors': 0}
+
+    async def start(self):
+        self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context('spawn'),
+                                             initializer=_init_worker, initargs=(os.getpid(),))
+        self._slots = asyncio.Semaphore(self.workers)
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        if self._executor is not None:
+            executor, self._executor = self._executor, None
+            # Ждущие расчёты отменяются, выполняемые доводятся до конца
+            await asyncio.to_thread(executor.shutdown, wait=True, cancel_futures=True)
+
+    async def serve_forever(self):
+        await self._server.serve_forever()
+
+    def metrics(self):
+        latencies = sorted(self._latencies)
+
+        def percentile(share):
+            if not latencies:
+                return None
+            return round(latencies[min(len(latencies) - 1, int(share * len(latencies)))] * 1000, 3)
+
+        return {
+            'queue_depth': self._queued,
+            'running': self._running,
+            'inflight': len(self._inflight),
+            'workers': self.workers,
+            'max_queue': self.max_queue,
+            **self.counters,
+            'latency_ms': {'count': len(latencies), 'p50': percentile(0.5), 'p95': percentile(0.95),
+                           'p99': percentile(0.99), 'max': percentile(1.0)},
+        }
+
+    # Расчёт с объединением одинаковых: задача создаётся один раз на ключ
+    def _computation(self, job, key, options):
+        computation_key = (job, key, *options)
+        task = self._inflight.get(computation_key)
+        if task is not None:
+            self.counters['coalesced'] += 1
+            return task
+        if self._queued >= self.max_queue:
+            raise RequestError(503, "Очередь расчётов заполнена")
+        self._queued += 1
+        self.counters['computations'] += 1
+        task = asyncio.ensure_future(self._compute(job, key, options))
+        self._inflight[computation_key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(computation_key, None))
+        return task
+
+    async def _compute(self, job, key, options):
+        try:
+            await self._slots.acquire()
+        finally:
+            self._queued -= 1
+        self._running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, _compute_task, job, key, *options)
+        finally:
+            self._running -= 1
+            self._slots.release()
+
+    async def _handle(self, reader, writer):
+        started = time.perf_counter()
+        try:
+            method, path, body = await _read_request(reader)
+            if path == '/schedule':
+                if method != 'POST':
+                    raise RequestError(405, "Ожидается POST")
+                self.counters['requests'] += 1
+                try:
+                    payload = json.loads(body or b'null')
+                except ValueError as e:
+                    raise RequestError(400, f"Неверный JSON: {e}")
+                job, algorithms, options = parse_schedule_request(payload, self.max_count)
+                tasks = [self._computation(job, key, options) for key in algorithms]
+                await self._stream(writer, tasks)
+                self._latencies.append(time.perf_counter() - started)
+            elif path in ('/metrics', '/health'):
+                if method != 'GET':
+                    raise RequestError(405, "Ожидается GET")
+                _write_json(writer, 200, self.metrics() if path == '/metrics' else {'status': 'ok'})
+            else:
+                raise RequestError(404, f"Неизвестный путь {path}")
+        except RequestError as e:
+            self.counters['rejected' if e.status == 503 else 'errors'] += 1
+            _write_json(writer, e.status, {'error': str(e)})
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except Exception as e:
+            self.counters['errors'] += 1
+            _write_json(writer, 500, {'error': f"{type(e).__name__}: {e}"})
+        try:
+            await writer.drain()
+            writer.close()
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+    # Результаты в порядке готовности, по строке JSON на фрагмент
+    async def _stream(self, writer, tasks):
+        writer.write(_headers(200, 'application/x-ndjson', chunked=True))
+        for next_result in asyncio.as_completed([asyncio.shield(task) for task in tasks]):
+            try:
+                result = await next_result
+            except Exception as e:
+                self.counters['errors'] += 1
+                result = {'error': f"{type(e).__name__}: {e}"}
+            line = (json.dumps(result, ensure_ascii=False) + '\n').encode('utf-8')
+            writer.write(b'%x\r\n%s\r\n' % (len(line), line))
+            await writer.drain()
+        writer.write(b'0\r\n\r\n')
+
+
+# Запрос HTTP/1.1: (метод, путь, тело); соединение закрывается после ответа
+async def _read_request(reader):
+    request_line = (await reader.readline()).decode('latin-1').split()
+    if len(request_line) != 3:
+        raise RequestError(400, "Неверная строка запроса")
+    method, path, _ = request_line
+    length = 0
+    while True:
+        line = (await reader.readline()).decode('latin-1')
+        if line in ('\r\n', '\n', ''):
+            break
+        name, _, value = line.partition(':')
+        if name.strip().lower() == 'content-length':
+            try:
+                length = int(value)
+            except ValueError:
+                raise RequestError(400, "Неверный Content-Length")
+    if length > MAX_BODY_BYTES:
+        raise RequestError(413, "Слишком большое тело запроса")
+    body = await reader.readexactly(length) if length else b''
+    return method, path.split('?', 1)[0], body
+
+
+def _headers(status, content_type, length=None, chunked=False):
+    lines = [f"HTTP/1.1 {status} {_REASONS[status]}", f"Content-Type: {content_type}", "Connection: close"]
+    lines.append("Transfer-Encoding: chunked" if chunked else f"Content-Length: {length}")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+
+def _write_json(writer, status, payload):
+    body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+    writer.write(_headers(status, 'application/json; charset=utf-8', len(body)) + body)
+
+
+async def _serve(args):
+    service = await ScheduleService(args.host, args.port, args.workers, args.max_queue, args.max_count).start()
+    print(f"listening on http://{service.host}:{service.port}, workers: {service.workers}", file=sys.stderr)
+    stopped = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    try:
+        for signal_number in (signal.SIGTERM, signal.SIGINT):
+            loop.add_signal_handler(signal_number, stopped.set)
+    except NotImplementedError:
+        pass  # Windows: остаётся KeyboardInterrupt
+    try:
+        await stopped.wait()
+    finally:
+        await service.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Локальная служба расписания автобусов (HTTP/JSON)")
+    parser.add_argument('--host', default=DEFAULT_HOST, help="адрес обратной петли (по умолчанию 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT, help="порт (0 - любой свободный)")
+    parser.add_argument('--workers', type=int, default=None, help="число процессов расчёта (по умолчанию по числу ядер)")
+    parser.add_argument('--max-queue', type=int, default=DEFAULT_MAX_QUEUE,
+                        help="максимум расчётов в очереди, после которого запросы получают 503")
+    parser.add_argument('--max-count', type=int, default=DEFAULT_MAX_COUNT,
+                        help=f"максимум автобусов и водителей каждого типа в запросе (не больше {COUNT_LIMIT})")
+    args = parser.parse_args(argv)
+    if not is_loopback(args.host):
+        parser.error("--host должен быть адресом обратной петли")
+    if not 0 < args.max_count <= COUNT_LIMIT:
+        parser.error(f"--max-count должно быть от 1 до {COUNT_LIMIT}")
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
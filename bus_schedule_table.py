@@ -0,0 +1,182 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Модель таблицы расписания для QTableView.
+#
+# ScheduleTableModel хранит по строке на водителя только числа: алгоритм,
+# водителя, отработанные минуты и минуты перерывов. Текст смен форматируется
+# в data(), то есть только для строк, которые видны на экране, и кэшируется до
+# следующей смены расписания. Фильтр по алгоритму, водителю и отработанным
+# минутам и сортировка по исходным значениям выполняются в самой модели
+# (list.sort с ключом), без QSortFilterProxyModel: прокси вызывал бы Python для
+# каждого сравнения и каждой строки. Модуль импортирует PyQt6, поэтому
+# подключается только из bus_schedule_app.
+
+import datetime
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+from bus_schedule_core import START_OF_SHIFT, ONE_MINUTE
+from bus_schedule_compact import CompactBoard, KIND_NAMES, ROUTE
+
+ALGORITHM_LABELS = ("Линейный", "Генетический", "Точный")
+HEADERS = ("Алгоритм", "Водитель", "Расписание", "Время работы", "Время перерыва")
+ALGORITHM, DRIVER, SHIFTS, WORK, BREAKS = range(5)
+
+
+class ScheduleTableModel(QAbstractTableModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # Все строки: (алгоритм, водитель, минуты работы, минуты перерывов, расписание, позиция водителя)
+        self._all_rows = []
+        # Строки после фильтра и сортировки - то, что видит представление
+        self._rows = []
+        self._base = None
+        self._shifts = {}
+        self._sort_column = None
+        self._sort_order = Qt.SortOrder.AscendingOrder
+        self._algorithm = None
+        self._driver = ""
+        self._min_worked = 0
+
+    # Новые расписания: одна перестройка модели вместо вставки строк по одной
+    # exact_schedule - расписание точного алгоритма (bus_schedule_exact), необязательно.
+    def set_schedules(self, linear_schedule, optimized_schedule, current_date, exact_schedule=None):
+        rows = []
+        for schedule, algorithm_name in zip((linear_schedule, optimized_schedule, exact_schedule), ALGORITHM_LABELS):
+            if schedule is None:
+                continue
+            if isinstance(schedule, CompactBoard):
+                for index, roster_index in enumerate(schedule.operators):
+                    if schedule.offsets[index] == schedule.offsets[index + 1]:
+                        continue
+                    worked = rested = 0
+                    for start, end, kind in schedule.operator_entries(index):
+                        if kind == ROUTE:
+                            worked += end - start
+                        else:
+                            rested += end - start
+                    rows.append((algorithm_name, schedule.roster[roster_index], worked, rested, schedule, index))
+            else:
+                for index, driver in enumerate(schedule.operators):
+                    if not driver.schedule:  # Водители без рейсов не показываются
+                        continue
+                    worked = rested = 0
+                    for start, end, type in driver.schedule:
+                        if type == 'route':
+                            worked += (end - start) // ONE_MINUTE
+                        elif type == 'break':
+                            rested += (end - start) // ONE_MINUTE
+                    rows.append((algorithm_name, driver.id, worked, rested, schedule, index))
+        self.beginResetModel()
+        self._all_rows = rows
+        self._base = datetime.datetime.combine(current_date, START_OF_SHIFT)
+        self._update_rows()
+        self.endResetModel()
+
+    # None - все алгоритмы
+    def set_algorithm(self, algorithm_name):
+        self._algorithm = algorithm_name
+        self._refilter()
+
+    # Подстрока идентификатора водителя, без учёта регистра
+    def set_driver(self, text):
+        self._driver = text.strip().upper()
+        self._refilter()
+
+    def set_min_worked(self, minutes):
+        self._min_worked = minutes
+        self._refilter()
+
+    def _refilter(self):
+        self.beginResetModel()
+        self._update_rows()
+        self.endResetModel()
+
+    # Отбор и сортировка строк; кэш текста смен привязан к строкам и сбрасывается
+    def _update_rows(self):
+        rows = self._all_rows
+        if self._algorithm is not None:
+            rows = [values for values in rows if values[0] == self._algorithm]
+        if self._driver:
+            rows = [values for values in rows if self._driver in values[1].upper()]
+        if self._min_worked:
+            rows = [values for values in rows if values[2] >= self._min_worked]
+        else:
+            rows = list(rows)
+        if self._sort_column is not None:
+            rows.sort(key=SORT_KEYS[self._sort_column], reverse=self._sort_order == Qt.SortOrder.DescendingOrder)
+        self._rows = rows
+        self._shifts = {}
+
+    # Вызывается представлением при щелчке по заголовку (setSortingEnabled)
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self._sort_column = column
+        self._sort_order = order
+        self.layoutAboutToBeChanged.emit()
+        self._update_rows()
+        self.layoutChanged.emit()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(HEADERS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return HEADERS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or not index.isValid():
+            return None
+        algorithm_name, driver_id, worked, rested, schedule, position = self._rows[index.row()]
+        column = index.column()
+        if column == ALGORITHM:
+            return algorithm_name
+        if column == DRIVER:
+            return driver_id
+        if column == WORK:
+            return f"{worked} мин"
+        if column == BREAKS:
+            return f"{rested} мин"
+        text = self._shifts.get(index.row())
+        if text is None:
+            text = self._shifts[index.row()] = self._format_shifts(schedule, position)
+        return text
+
+    # Текст смен водителя (как в прежней таблице)
+    def _format_shifts(self, schedule, position):
+        if isinstance(schedule, CompactBoard):
+            entries = ((self._base + start * ONE_MINUTE, self._base + end * ONE_MINUTE, KIND_NAMES[kind])
+                       for start, end, kind in schedule.operator_entries(position))
+        else:
+            entries = schedule.operators[position].schedule
+        parts = []
+        for start, end, type in entries:
+            label = "Работа" if type == 'route' else "Перерыв"
+            parts.append(f"{label}: {start.strftime('%H:%M')}-{end.strftime('%H:%M')}")
+        return ", ".join(parts)
+
+
+# Водители по номеру: A2 раньше A10
+def _driver_key(values):
+    driver_id = values[1]
+    number = driver_id[1:]
+    return driver_id[:1], int(number) if number.isdigit() else 0, driver_id
+
+
+# Исходный порядок: алгоритм, затем позиция водителя в расписании
+def _schedule_order_key(values):
+    return ALGORITHM_LABELS.index(values[0]), values[5]
+
+
+# Ключи сортировки по столбцам; смены сортируются в исходном порядке
+SORT_KEYS = {
+    ALGORITHM: _schedule_order_key,
+    DRIVER: _driver_key,
+    SHIFTS: _schedule_order_key,
+    WORK: lambda values: values[2],
+    BREAKS: lambda values: values[3],
+}
@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Проверка расписания на допустимость.
+#
+# Скрещивание склеивает рейсы и водителей родителей независимо, поэтому в
+# расписании генетического алгоритма могут встретиться:
+#   - OVERLAP - рейс или перерыв водителя пересекается с предыдущей записью;
+#   - HOURS - работа водителя (рейсы и перерывы) превышает TYPE_A_HOURS или
+#     TYPE_B_HOURS;
+#   - BREAK_MISSING - водитель типа B начинает рейс, отработав с последнего перерыва
+#     TYPE_B_BREAK_INTERVAL минут и больше;
+#   - UNKNOWN_DRIVER - рейс назначен водителю, которого нет среди operators.
+# Рейсы берутся из itineraries, перерывы и тип - у водителя с тем же id в
+# operators (при повторах - у первого). Записи каждого водителя сортируются по
+# началу и просматриваются один раз: O(n log n) на n записей.
+#
+# Нарушение - кортеж (вид, id водителя, начало, конец) записи, на которой оно
+# найдено: datetime для ScheduleBoard, минуты от начала смены для CompactBoard.
+# Число нарушений кэшируется в расписании до invalidate(), поэтому штраф
+# (assess_penalized) можно считать для каждой особи каждого поколения.
+# drop_violations - шаг исправления: снимает рейсы с нарушениями из рейсов
+# расписания и из записей их водителей, после чего расписание проходит
+# проверку (кроме пересечений перерывов друг с другом и превышения часов
+# одними перерывами).
+
+import collections
+import datetime
+from array import array
+
+from bus_schedule_core import TYPE_A_MINUTES, TYPE_B_MINUTES, TYPE_B_BREAK_INTERVAL, assess_schedule
+from bus_schedule_compact import CompactBoard, ROUTE, BREAK
+
+OVERLAP = 'overlap'
+HOURS = 'hours'
+BREAK_MISSING = 'break'
+UNKNOWN_DRIVER = 'unknown_driver'
+VIOLATION_KINDS = (OVERLAP, HOURS, BREAK_MISSING, UNKNOWN_DRIVER)
+
+# Штраф за нарушение в assess_penalized: больше, чем даёт один рейс
+VIOLATION_PENALTY = 2.0
+
+# Лимиты (тип A, тип B, работа без перерыва) в единицах представления
+_MINUTE_LIMITS = (TYPE_A_MINUTES, TYPE_B_MINUTES, TYPE_B_BREAK_INTERVAL)
+_DATETIME_LIMITS = tuple(datetime.timedelta(minutes=limit) for limit in _MINUTE_LIMITS)
+
+
+# Просмотр записей водителей. intervals: id -> [(начало, конец, позиция рейса
+# или -1 для перерыва)], types: id -> 'A'/'B'. Возвращает нарушения и позиции
+# рейсов, которые нужно снять, чтобы остальные записи были допустимы.
+def _scan(intervals, types, limits, zero):
+    violations = []
+    dropped = []
+    for driver, entries in intervals.items():
+        operator_type = types.get(driver)
+        if operator_type is None:
+            for start, end, position in entries:
+                violations.append((UNKNOWN_DRIVER, driver, start, end))
+                dropped.append(position)
+            continue
+        entries.sort()
+        limit = limits[0] if operator_type == 'A' else limits[1]
+        check_break = operator_type != 'A'
+        worked = zero
+        run = zero       # работа с последнего перерыва
+        last_end = None  # конец последней оставленной записи
+        # Последний оставленный рейс сразу перед текущей записью:
+        # (позиция, длительность, last_end до этого рейса)
+        last_route = None
+        for start, end, position in entries:
+            duration = end - start
+            if position < 0:
+                if last_end is not None and start < last_end:
+                    violations.append((OVERLAP, driver, start, end))
+                    if last_route is not None:
+                        # Перерыв важнее рейса: пересекающийся рейс снимается
+                        dropped.append(last_route[0])
+                        worked -= last_route[1]
+                        last_end = last_route[2]
+                worked += duration
+                if worked > limit:
+                    violations.append((HOURS, driver, start, end))
+                run = zero
+                last_end = end if last_end is None else max(last_end, end)
+                last_route = None
+                continue
+            kind = None
+            if last_end is not None and start < last_end:
+                kind = OVERLAP
+            elif worked + duration > limit:
+                kind = HOURS
+            elif check_break and run >= limits[2]:
+                kind = BREAK_MISSING
+            if kind is not None:
+                violations.append((kind, driver, start, end))
+                dropped.append(position)
+                continue
+            worked += duration
+            run += duration
+            last_route = (position, duration, last_end)
+            last_end = end
+    return violations, dropped
+
+
+def _schedule_intervals(schedule):
+    types = {}
+    intervals = {}
+    for operator in schedule.operators:
+        if operator.id in types:
+            continue
+        types[operator.id] = operator.type
+        intervals[operator.id] = [(start, end, -1) for start, end, kind in operator.schedule if kind == 'break']
+    for position, itinerary in enumerate(schedule.itineraries):
+        entries = intervals.get(itinerary.driver)
+        if entries is None:
+            entries = intervals[itinerary.driver] = []
+        entries.append((itinerary.start, itinerary.end, position))
+    return _scan(intervals, types, _DATETIME_LIMITS, datetime.timedelta())
+
+
+def _compact_intervals(board):
+    roster = board.roster
+    types = {}
+    intervals = {}
+    entry_starts, entry_ends, entry_kinds, offsets = board.entry_starts, board.entry_ends, board.entry_kinds, board.offsets
+    for index, roster_index in enumerate(board.operators):
+        driver = roster[roster_index]
+        if driver in types:
+            continue
+        types[driver] = chr(board.operator_types[index])
+        intervals[driver] = [(entry_starts[entry], entry_ends[entry], -1)
+                             for entry in range(offsets[index], offsets[index + 1]) if entry_kinds[entry] == BREAK]
+    for position, (start, end, roster_index) in enumerate(zip(board.starts, board.ends, board.drivers)):
+        driver = roster[roster_index]
+        entries = intervals.get(driver)
+        if entries is None:
+            entries = intervals[driver] = []
+        entries.append((start, end, position))
+    return _scan(intervals, types, _MINUTE_LIMITS, 0)
+
+
+def _check(schedule):
+    if isinstance(schedule, CompactBoard):
+        return _compact_intervals(schedule)
+    return _schedule_intervals(schedule)
+
+
+# Все нарушения расписания (ScheduleBoard или CompactBoard)
+def validate_schedule(schedule):
+    violations, dropped = _check(schedule)
+    schedule._violations = len(violations)
+    return violations
+
+
+# Число нарушений с кэшем в расписании
+def count_violations(schedule):
+    if schedule._violations is None:
+        validate_schedule(schedule)
+    return schedule._violations
+
+
+# Оценка assess_schedule со штрафом за нарушения
+def assess_penalized(schedule):
+    return assess_schedule(schedule) - VIOLATION_PENALTY * count_violations(schedule)
+
+
+# Снятие рейсов с нарушениями на месте: из рейсов расписания и из записей
+# водителя рейса (первого с этим id). Массивы CompactBoard и объекты водителей
+# ScheduleBoard могут быть общими с другими расписаниями, поэтому они не
+# меняются, а заменяются новыми. Возвращает то же расписание.
+def drop_violations(schedule):
+    violations, dropped = _check(schedule)
+    if dropped:
+        dropped = set(dropped)
+        if isinstance(schedule, CompactBoard):
+            _drop_compact(schedule, dropped)
+        else:
+            _drop_objects(schedule, dropped)
+        schedule.invalidate()
+    schedule._violations = len(violations) - len(dropped)
+    return schedule
+
+
+def _drop_objects(schedule, dropped):
+    routes = collections.Counter()  # (водитель, начало, конец) -> число снятых рейсов
+    for position in dropped:
+        itinerary = schedule.itineraries[position]
+        routes[itinerary.driver, itinerary.start, itinerary.end] += 1
+    schedule.itineraries = [itinerary for position, itinerary in enumerate(schedule.itineraries)
+                            if position not in dropped]
+    seen = set()
+    for index, operator in enumerate(schedule.operators):
+        if operator.id in seen:
+            continue
+        seen.add(operator.id)
+        entries = []
+        removed = datetime.timedelta()
+        for start, end, kind in operator.schedule:
+            if kind == 'route' and routes[operator.id, start, end]:
+                routes[operator.id, start, end] -= 1
+                removed += end - start
+                continue
+            entries.append((start, end, kind))
+        if len(entries) < len(operator.schedule):
+            operator = schedule.operators[index] = operator.with_type(operator.type)
+            operator.schedule = entries
+            operator.total_time -= removed
+
+
+def _drop_compact(board, dropped):
+    routes = collections.Counter((board.drivers[position], board.starts[position], board.ends[position])
+                                 for position in dropped)
+    keep = [position for position in range(len(board.starts)) if position not in dropped]
+    board.starts = array('h', [board.starts[position] for position in keep])
+    board.ends = array('h', [board.ends[position] for position in keep])
+    board.drivers = array('h', [board.drivers[position] for position in keep])
+    board.peaks = bytearray(board.peaks[position] for position in keep)
+    seen = set()
+    entries = []
+    offsets = array('i', [0])
+    entry_starts, entry_ends, entry_kinds = board.entry_starts, board.entry_ends, board.entry_kinds
+    for index, roster_index in enumerate(board.operators):
+        first = roster_index not in seen
+        seen.add(roster_index)
+        for entry in range(board.offsets[index], board.offsets[index + 1]):
+            key = (roster_index, entry_starts[entry], entry_ends[entry])
+            if first and entry_kinds[entry] == ROUTE and routes[key]:
+                routes[key] -= 1
+                continue
+            entries.append(entry)
+        offsets.append(len(entries))
+    board.offsets = offsets
+    board.entry_starts = array('h', [entry_starts[entry] for entry in entries])
+    board.entry_ends = array('h', [entry_ends[entry] for entry in entries])
+    board.entry_kinds = bytearray(entry_kinds[entry] for entry in entries)
+
@@ -0,0 +1,239 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Векторизованный генетический алгоритм: вся популяция в массивах NumPy.
+#
+# Каждая особь - строка массива itineraries (особи x позиции рейсов x 4, int16):
+# начало рейса в минутах от начала смены, длительность, индекс водителя и
+# выравнивание. Массив operators (особи x позиции водителей x 2, int32) хранит
+# тип водителя и ссылку на его смену в начальной популяции. Четыре int16 и два
+# int32 занимают ровно 64 бита, поэтому скрещивание переставляет позиции как
+# int64 одной операцией над всеми особями. Мутации и оценка тоже выполняются
+# сразу для всей популяции.
+#
+# Требуется numpy (pip install numpy); ядро от него не зависит.
+
+import random
+
+import numpy as np
+
+from bus_schedule_core import (START_OF_SHIFT, END_OF_SHIFT, MIN_ROUTE_TIME, MAX_ROUTE_TIME,
+                               POPULATION_SIZE_GA, GENERATIONS_GA, MUTATION_RATE_GA, current_profiler)
+from bus_schedule_compact import (CompactBoard, PEAK_BY_OFFSET, MINUTES_PER_DAY, peak_flags,
+                                  generate_initial_schedule_compact)
+
+PEAK_TABLE = np.frombuffer(PEAK_BY_OFFSET, dtype=np.uint8)
+TYPE_CODES = np.frombuffer(b'AB', dtype=np.uint8)
+# Окно допустимого начала рейса после мутации: от начала смены до END_OF_SHIFT следующих суток
+MUTATION_WINDOW_END = (24 * 60 + END_OF_SHIFT.hour * 60 + END_OF_SHIFT.minute
+                       - START_OF_SHIFT.hour * 60 - START_OF_SHIFT.minute)
+
+
+START, DURATION, DRIVER = 0, 1, 2
+TYPE, ORIGIN = 0, 1
+
+
+# Позиции особей как int64: (особи x позиции x k) -> (особи x позиции)
+def _packed(array):
+    return array.view(np.int64)[:, :, 0]
+
+
+def _unpacked(packed, like):
+    return packed.view(like.dtype).reshape(packed.shape + like.shape[2:])
+
+
+class VectorPopulation:
+    __slots__ = ('itineraries', 'lengths', 'operators', 'operator_counts')
+
+    def __init__(self, itineraries, lengths, operators, operator_counts):
+        self.itineraries = itineraries
+        self.lengths = lengths
+        self.operators = operators
+        self.operator_counts = operator_counts
+
+    def __len__(self):
+        return len(self.lengths)
+
+    # Особи с номерами rows (копия)
+    def take(self, rows):
+        return VectorPopulation(self.itineraries[rows], self.lengths[rows],
+                                self.operators[rows], self.operator_counts[rows])
+
+    def concatenate(self, other):
+        return VectorPopulation(np.concatenate((self.itineraries, other.itineraries)),
+                                np.concatenate((self.lengths, other.lengths)),
+                                np.concatenate((self.operators, other.operators)),
+                                np.concatenate((self.operator_counts, other.operator_counts)))
+
+
+# Кодирование списка CompactBoard в массивы
+def encode_population(boards):
+    count = len(boards)
+    width = max([len(board.starts) for board in boards] + [1])
+    operator_width = max([len(board.operators) for board in boards] + [1])
+    itineraries = np.zeros((count, width, 4), dtype=np.int16)
+    operators = np.zeros((count, operator_width, 2), dtype=np.int32)
+    lengths = np.zeros(count, dtype=np.int32)
+    operator_counts = np.zeros(count, dtype=np.int32)
+    for row, board in enumerate(boards):
+        length = len(board.starts)
+        board_starts = np.frombuffer(board.starts, dtype=np.int16)
+        itineraries[row, :length, START] = board_starts
+        itineraries[row, :length, DURATION] = np.frombuffer(board.ends, dtype=np.int16) - board_starts
+        itineraries[row, :length, DRIVER] = np.frombuffer(board.drivers, dtype=np.int16)
+        lengths[row] = length
+        operator_count = len(board.operators)
+        operators[row, :operator_count, TYPE] = np.frombuffer(bytes(board.operator_types), dtype=np.uint8)
+        # Ссылка на смену: номер позиции водителя во всей начальной популяции
+        operators[row, :, ORIGIN] = np.arange(row * operator_width, (row + 1) * operator_width)
+        operator_counts[row] = operator_count
+    return VectorPopulation(itineraries, lengths, operators, operator_counts)
+
+
+# Восстановление особи row в CompactBoard; смены водителей берутся из начальной популяции
+def decode_individual(population, row, boards):
+    source_board = boards[0]
+    board = CompactBoard(source_board.current_date, source_board.roster)
+    itineraries = population.itineraries[row, :population.lengths[row]]
+    starts = itineraries[:, START]
+    board.starts.extend(starts.tolist())
+    board.ends.extend((starts + itineraries[:, DURATION]).tolist())
+    board.drivers.extend(itineraries[:, DRIVER].tolist())
+    board.peaks = peak_flags(board.starts)
+    operator_width = population.operators.shape[1]
+    for operator_type, origin in population.operators[row, :population.operator_counts[row]].tolist():
+        source, position = divmod(origin, operator_width)
+        source = boards[source]
+        board.operators.append(source.operators[position])
+        board.operator_types.append(operator_type)
+        for start, end, kind in source.operator_entries(position):
+            board.entry_starts.append(start)
+            board.entry_ends.append(end)
+            board.entry_kinds.append(kind)
+        board.offsets.append(len(board.entry_starts))
+    return board
+
+
+# Оценка всех особей (как assess_schedule)
+def assess_population(population):
+    return population.lengths - population.operator_counts * 0.1
+
+
+# Статистика всех особей (как calculate_statistics): массив (особи x 3)
+def population_statistics(population):
+    valid = np.arange(population.itineraries.shape[1]) < population.lengths[:, None]
+    starts = population.itineraries[:, :, START].astype(np.int64)
+    peaks = (PEAK_TABLE[starts % MINUTES_PER_DAY] & valid).sum(axis=1)
+    return np.stack((population.lengths, peaks, population.operator_counts), axis=1)
+
+
+# Одноточечное скрещивание пар (first[i], second[i]) для всех пар сразу.
+# s1[:k] + s2[k:] при k <= min(len(s1), len(s2)) имеет длину len(s2).
+def combine_population(population, first, second, rng):
+    second_lengths = population.lengths[second]
+    split = rng.integers(0, np.minimum(population.lengths[first], second_lengths) + 1)
+    from_first = np.arange(population.itineraries.shape[1]) < split[:, None]
+    packed = _packed(population.itineraries)
+    itineraries = _unpacked(np.where(from_first, packed[first], packed[second]), population.itineraries)
+
+    second_counts = population.operator_counts[second]
+    split = rng.integers(0, np.minimum(population.operator_counts[first], second_counts) + 1)
+    from_first = np.arange(population.operators.shape[1]) < split[:, None]
+    packed = _packed(population.operators)
+    operators = _unpacked(np.where(from_first, packed[first], packed[second]), population.operators)
+    return VectorPopulation(itineraries, second_lengths, operators, second_counts)
+
+
+# Мутации всех особей на месте: сдвиг рейса на ±30 минут и смена типа водителя
+def alter_population(population, rng):
+    rows = np.flatnonzero((rng.random(len(population)) < MUTATION_RATE_GA) & (population.lengths > 0))
+    if len(rows):
+        columns = rng.integers(0, population.lengths[rows])
+        new_starts = population.itineraries[rows, columns, START] + rng.integers(-30, 31, size=len(rows))
+        inside = (new_starts > 0) & (new_starts < MUTATION_WINDOW_END)
+        rows, columns = rows[inside], columns[inside]
+        population.itineraries[rows, columns, START] = new_starts[inside]
+        population.itineraries[rows, columns, DURATION] = rng.integers(MIN_ROUTE_TIME, MAX_ROUTE_TIME + 1, size=len(rows))
+
+    rows = np.flatnonzero(population.operator_counts > 0)
+    if len(rows):
+        columns = rng.integers(0, population.operator_counts[rows])
+        population.operators[rows, columns, TYPE] = rng.choice(TYPE_CODES, size=len(rows))
+    return population
+
+
+# Лучшая особь популяции: (оценка, номер строки)
+def best_individual(population):
+    fitness = assess_population(population)
+    row = int(np.argmax(fitness))
+    return float(fitness[row]), row
+
+
+# Эволюция закодированной популяции (как evolve_population).
+# Родителей и потомков вместе не больше population_size, поэтому отбор после
+# скрещивания ничего не отбрасывает, а устойчивая сортировка в начале
+# следующего поколения даёт тот же порядок - вторая сортировка не нужна.
+# on_generation(generation, population) получает неотсортированную популяцию;
+# если он вернёт True, эволюция останавливается.
+def evolve_vector_population(population, generations, population_size, rng, on_generation=None):
+    profiler = current_profiler()
+    half = population_size // 2
+    for generation in range(generations):
+        if profiler is not None:
+            started = profiler.clock()
+        order = np.argsort(-assess_population(population), kind='stable')
+        parents = population.take(order[:half])
+        if profiler is not None:
+            sorted_at = profiler.clock()
+        paired = len(parents) // 2 * 2
+        first = np.empty(paired, dtype=np.intp)
+        second = np.empty(paired, dtype=np.intp)
+        first[0::2] = second[1::2] = np.arange(0, paired, 2)
+        first[1::2] = second[0::2] = np.arange(1, paired, 2)
+        offspring = combine_population(parents, first, second, rng)
+        if len(parents) % 2:
+            offspring = offspring.concatenate(parents.take([len(parents) - 1]))
+        if profiler is not None:
+            combined_at = profiler.clock()
+        alter_population(offspring, rng)
+        if profiler is not None:
+            altered_at = profiler.clock()
+        population = parents.concatenate(offspring)
+        if profiler is not None:
+            fitness = assess_population(population)
+            statistics = population_statistics(population)
+            profiler.generation(generation + 1, started,
+                                {'sort': sorted_at - started, 'combine': combined_at - sorted_at,
+                                 'alter': altered_at - combined_at, 'select': profiler.clock() - altered_at},
+                                fitness.tolist(), len(np.unique(statistics, axis=0)) / len(population))
+        if on_generation is not None and on_generation(generation + 1, population):
+            break
+
+    order = np.argsort(-assess_population(population), kind='stable')
+    return population.take(order[:population_size])
+
+
+# Генетический алгоритм на матрицах NumPy; возвращает CompactBoard.
+# Без seed зерно берётся из модуля random, так что random.seed делает запуск воспроизводимым.
+# on_generation(generation, population, boards) - boards нужны для decode_individual.
+# warm_start - готовые CompactBoard в начале популяции, как в genetic_optimizer.
+def vectorized_genetic_optimizer(bus_count, type_a_drivers, type_b_drivers, current_date,
+                                 population_size=POPULATION_SIZE_GA, generations=GENERATIONS_GA, seed=None,
+                                 on_generation=None, warm_start=None):
+    if population_size < 2:
+        raise ValueError("Для скрещивания нужно не меньше двух особей")
+    rng = np.random.default_rng(random.getrandbits(64) if seed is None else seed)
+    profiler = current_profiler()
+    if profiler is not None:
+        started = profiler.clock()
+    boards = list(warm_start or ())[:population_size]
+    boards += [generate_initial_schedule_compact(bus_count, type_a_drivers, type_b_drivers, current_date)
+               for _ in range(population_size - len(boards))]
+    if profiler is not None:
+        profiler.span('initial_population', 'genetic', started, args={'size': population_size})
+    callback = None
+    if on_generation is not None:
+        def callback(generation, population):
+            return on_generation(generation, population, boards)
+    population = evolve_vector_population(encode_population(boards), generations, population_size, rng, callback)
+    return decode_individual(population, 0, boards)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# Фоновый поток для графического интерфейса: алгоритмы выполняются вне
+# главного потока Qt, а результаты передаются окну сигналами. Модуль
+# импортирует PyQt6, поэтому подключается только из bus_schedule_app.main().
+
+import copy
+import threading
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from bus_schedule_core import create_linear_schedule, genetic_optimizer
+from bus_schedule_exact import create_exact_schedule
+
+# Как часто (в поколениях) окно получает текущее лучшее расписание для таблицы
+TABLE_UPDATE_INTERVAL = 10
+
+
+class ScheduleWorker(QThread):
+    # Линейное и точное расписание - до начала генетического алгоритма
+    baselines_ready = pyqtSignal(object, object)
+    # Номер поколения и лучшая оценка
+    progress = pyqtSignal(int, float)
+    # Линейное расписание и копия текущего лучшего генетического
+    intermediate = pyqtSignal(object, object)
+    # Линейное и итоговое генетическое расписание; флаг отмены
+    schedule_ready = pyqtSignal(object, object, bool)
+    failed = pyqtSignal(str)
+
+    def __init__(self, bus_count, type_a_drivers, type_b_drivers, current_date, parent=None):
+        super().__init__(parent)
+        self.bus_count = bus_count
+        self.type_a_drivers = type_a_drivers
+        self.type_b_drivers = type_b_drivers
+        self.current_date = current_date
+        self._cancel = threading.Event()
+        self._linear_schedule = None
+
+    # Запрос отмены: оптимизация остановится после текущего поколения
+    # и вернёт лучшее найденное расписание
+    def cancel(self):
+        self._cancel.set()
+
+    def run(self):
+        try:
+            self._linear_schedule = create_linear_schedule(self.bus_count, self.type_a_drivers,
+                                                           self.type_b_drivers, self.current_date)
+            self.baselines_ready.emit(self._linear_schedule,
+                                      create_exact_schedule(self.bus_count, self.type_a_drivers,
+                                                            self.type_b_drivers, self.current_date))
+            optimized_schedule = genetic_optimizer(self.bus_count, self.type_a_drivers, self.type_b_drivers,
+                                                   self.current_date, on_generation=self._on_generation)
+            self.schedule_ready.emit(self._linear_schedule, optimized_schedule, self._cancel.is_set())
+        except Exception as e:
+            self.failed.emit(str(e))
+
+    def _on_generation(self, generation, best_fitness, best):
+        self.progress.emit(generation, best_fitness)
+        if generation % TABLE_UPDATE_INTERVAL == 0:
+            # Популяция продолжает меняться, поэтому окну передаётся копия
+            self.intermediate.emit(self._linear_schedule, copy.deepcopy(best()))
+        return self._cancel.is_set()
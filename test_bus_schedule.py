@@ -0,0 +1,204 @@
+# coding: utf-8
+
+# Регрессионные тесты: прямой алгоритм (индекс водителей и компактное
+# представление) против зафиксированного исходного алгоритма и виды
+# нарушений bus_schedule_validate.
+#
+# Запуск: python -m pytest -q
+
+import datetime
+import hashlib
+import random
+
+import pytest
+
+import bus_schedule_core as core
+from bus_schedule_compact import create_linear_schedule_compact, from_schedule_board
+from bus_schedule_repair import ScheduleRepairer
+from bus_schedule_validate import (OVERLAP, HOURS, BREAK_MISSING, UNKNOWN_DRIVER, validate_schedule,
+                                   drop_violations)
+
+# Отпечатки расписаний исходного create_linear_schedule (до индекса водителей):
+# (зерно, автобусы, тип A, тип B, дата, число рейсов, отпечаток)
+BASELINE = [
+    (0, 8, 10, 5, '2024-03-04', 52, '86b4e450f166f964'),
+    (1, 8, 10, 5, '2024-03-09', 114, '1796f40b15733370'),
+    (2, 12, 14, 6, '2024-03-05', 70, '4d93a0dbd817f371'),
+    (3, 3, 2, 1, '2024-03-06', 8, 'c211dd0a943b9929'),
+    (4, 20, 6, 10, '2024-03-10', 147, 'cee2602a1fe100a2'),
+    (5, 40, 50, 25, '2024-03-07', 223, 'db9a00d2ed7c5b32'),
+]
+
+MONDAY = datetime.date(2024, 3, 4)
+
+
+# Рейсы и записи водителей в минутах от начала смены
+def fingerprint(schedule, current_date):
+    start = datetime.datetime.combine(current_date, core.START_OF_SHIFT)
+    minute = core.ONE_MINUTE
+    rows = sorted(((itinerary.start - start) // minute, (itinerary.end - itinerary.start) // minute,
+                   itinerary.driver) for itinerary in schedule.itineraries)
+    entries = sorted((operator.id, (entry_start - start) // minute, (entry_end - start) // minute, kind)
+                     for operator in schedule.operators for entry_start, entry_end, kind in operator.schedule)
+    return len(rows), hashlib.sha1(repr((rows, entries)).encode()).hexdigest()[:16]
+
+
+@pytest.mark.parametrize('seed, bus_count, type_a, type_b, date, itineraries, digest', BASELINE)
+def test_linear_schedule_matches_baseline(seed, bus_count, type_a, type_b, date, itineraries, digest):
+    current_date = datetime.date.fromisoformat(date)
+    random.seed(seed)
+    schedule = core.create_linear_schedule(bus_count, type_a, type_b, current_date)
+    assert fingerprint(schedule, current_date) == (itineraries, digest)
+
+
+@pytest.mark.parametrize('seed, bus_count, type_a, type_b, date, itineraries, digest', BASELINE)
+def test_compact_linear_schedule_matches_baseline(seed, bus_count, type_a, type_b, date, itineraries, digest):
+    current_date = datetime.date.fromisoformat(date)
+    random.seed(seed)
+    board = create_linear_schedule_compact(bus_count, type_a, type_b, current_date)
+    assert fingerprint(board.to_schedule_board(), current_date) == (itineraries, digest)
+
+
+def test_genetic_initial_population_does_not_depend_on_workers():
+    fingerprints = set()
+    for workers in (1, 2):
+        random.seed(7)
+        schedule = core.genetic_optimizer(8, 10, 5, MONDAY, population_size=6, generations=3, workers=workers)
+        fingerprints.add(fingerprint(schedule, MONDAY))
+    assert len(fingerprints) == 1
+
+
+# Расписание из записей (водитель, тип, [(начало 'ЧЧ:ММ', минут, 'route' или 'break')]);
+# водитель с типом None есть только в рейсах
+def make_schedule(drivers):
+    schedule = core.ScheduleBoard()
+    for driver, operator_type, entries in drivers:
+        operator = core.BusOperator(operator_type, driver)
+        for start, duration, kind in entries:
+            start = datetime.datetime.combine(MONDAY, datetime.time.fromisoformat(start))
+            end = start + datetime.timedelta(minutes=duration)
+            if kind == 'route':
+                schedule.add_itinerary(core.Itinerary(start, duration, driver))
+            operator.schedule.append((start, end, kind))
+            operator.total_time += end - start
+        if operator_type is not None:
+            schedule.operators.append(operator)
+    return schedule
+
+
+def kinds(schedule):
+    return [violation[:2] for violation in validate_schedule(schedule)]
+
+
+CASES = {
+    'valid': ([('A1', 'A', [('06:00', 70, 'route'), ('07:20', 70, 'route')]),
+               ('B1', 'B', [('06:00', 70, 'route'), ('07:10', 70, 'route'), ('08:20', 40, 'break'),
+                            ('09:00', 70, 'route')])], []),
+    'overlap': ([('A1', 'A', [('06:00', 70, 'route'), ('07:00', 70, 'route')])], [(OVERLAP, 'A1')]),
+    'hours': ([('A1', 'A', [(f'{6 + hour:02d}:{minute:02d}', 70, 'route')
+                            for hour, minute in ((0, 0), (1, 10), (2, 20), (3, 30), (4, 40), (5, 50), (7, 0))])],
+              [(HOURS, 'A1')]),
+    'break': ([('B1', 'B', [('06:00', 70, 'route'), ('07:10', 70, 'route'), ('08:20', 70, 'route')])],
+              [(BREAK_MISSING, 'B1')]),
+    'unknown_driver': ([('A1', 'A', [('06:00', 70, 'route')]), ('A9', None, [('06:00', 70, 'route')])],
+                       [(UNKNOWN_DRIVER, 'A9')]),
+}
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_validate_schedule(name):
+    drivers, expected = CASES[name]
+    schedule = make_schedule(drivers)
+    assert kinds(schedule) == expected
+    # Компактное представление даёт те же нарушения
+    assert kinds(from_schedule_board(schedule, MONDAY)) == expected
+
+
+# Рейсы расписания и рейсы в записях водителей: (водитель, начало, конец)
+def routes(schedule):
+    itineraries = sorted((itinerary.driver, itinerary.start, itinerary.end) for itinerary in schedule.itineraries)
+    known = {operator.id for operator in schedule.operators}
+    timelines = sorted((operator.id, start, end) for operator in schedule.operators
+                       for start, end, kind in operator.schedule if kind == 'route')
+    return [route for route in itineraries if route[0] in known], timelines
+
+
+@pytest.mark.parametrize('name', CASES)
+def test_drop_violations(name):
+    drivers, expected = CASES[name]
+    schedule = make_schedule(drivers)
+    board = from_schedule_board(schedule, MONDAY)
+    itineraries = len(schedule.itineraries)
+    drop_violations(schedule)
+    assert validate_schedule(schedule) == []
+    assert len(schedule.itineraries) == itineraries - len(expected)
+    itineraries, timelines = routes(schedule)
+    assert itineraries == timelines
+    drop_violations(board)
+    assert validate_schedule(board) == []
+    assert routes(board.to_schedule_board()) == (itineraries, timelines)
+
+
+# Перерыв внутри рейса: рейс снимается, и следующий рейс после перерыва остаётся
+def test_drop_violations_after_break_inside_route():
+    schedule = make_schedule([('B1', 'B', [('06:00', 60, 'route'), ('07:00', 70, 'route'), ('07:30', 30, 'break'),
+                                           ('08:00', 70, 'route')])])
+    assert kinds(schedule) == [(OVERLAP, 'B1')]
+    drop_violations(schedule)
+    assert validate_schedule(schedule) == []
+    assert [itinerary.start.time() for itinerary in schedule.itineraries] == [datetime.time(6), datetime.time(8)]
+    assert routes(schedule)[0] == routes(schedule)[1]
+
+
+# Прямой алгоритм в выходной даёт пересечения перерывов с рейсами
+@pytest.mark.parametrize('seed', range(3))
+def test_drop_violations_on_linear_schedule(seed):
+    current_date = datetime.date(2024, 3, 9)
+    random.seed(seed)
+    schedule = core.create_linear_schedule(8, 10, 5, current_date)
+    board = from_schedule_board(schedule, current_date)
+    drop_violations(schedule)
+    drop_violations(board)
+    assert validate_schedule(schedule) == validate_schedule(board) == []
+    itineraries, timelines = routes(schedule)
+    assert itineraries == timelines
+    assert all(operator.total_time == sum((end - start for start, end, _ in operator.schedule), datetime.timedelta())
+               for operator in schedule.operators)
+    assert fingerprint(board.to_schedule_board(), current_date) == fingerprint(schedule, current_date)
+
+
+# Записи всех водителей расписания: id -> записи
+def timelines(schedule):
+    return {operator.id: list(operator.schedule) for operator in schedule.operators}
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_change_bus_count_to_same_count_changes_nothing(seed):
+    random.seed(seed)
+    schedule = core.create_linear_schedule(8, 10, 5, MONDAY)
+    before = fingerprint(schedule, MONDAY)
+    report = ScheduleRepairer(schedule, MONDAY, bus_count=8).change_bus_count(8, datetime.datetime(2024, 3, 4, 6))
+    assert report == {'reassigned': [], 'unassigned': [], 'added': [], 'removed': []}
+    assert fingerprint(schedule, MONDAY) == before
+
+
+@pytest.mark.parametrize('seed', range(3))
+def test_remove_operator_touches_only_its_trips(seed):
+    random.seed(seed)
+    schedule = core.create_linear_schedule(8, 10, 5, MONDAY)
+    at = datetime.datetime(2024, 3, 4, 12)
+    before = timelines(schedule)
+    victim = next(operator.id for operator in schedule.operators
+                  if any(kind == 'route' and start >= at for start, _, kind in operator.schedule))
+    trips = [start for start, _, kind in before[victim] if kind == 'route' and start >= at]
+    report = ScheduleRepairer(schedule, MONDAY, bus_count=8).remove_operator(victim, at)
+    moved = sorted(itinerary.start for itinerary in report['reassigned'] + report['unassigned'])
+    assert moved == trips
+    after = timelines(schedule)
+    assert [entry for entry in after.get(victim, []) if entry[0] >= at] == []
+    for operator_id, entries in before.items():
+        if operator_id != victim:
+            # Остальные водители только получают рейсы выбывшего
+            assert set(entries) <= set(after[operator_id])
+            added = set(after[operator_id]) - set(entries)
+            assert all(kind == 'route' and start in trips for start, _, kind in added)